@@ -23,6 +23,9 @@ from .src.simple_ksampler import SimpleSamplerCustom
 from .src.filter_tags import FilterTags
 from .src.generate_all_character_images import GenerateCharactersNode
 from .src.upscaler import AutoTaggedTiledUpscaler
+from .src.lora_weight_cache import LoraWeightCache
+from .src.tile_tag_cache import TileTagCache
+from .src.conditioning_cache import ConditioningCache
 
 # Constants
 WEB_DIRECTORY = "./web"
@@ -203,6 +206,21 @@ async def set_hidden_characters(request):
     return web.json_response({"status": "ok"})
 
 
+@PromptServer.instance.routes.get(f"{API_PREFIX}/lora_cache")
+async def get_lora_cache_stats(request):
+    return web.json_response(LoraWeightCache.get_stats())
+
+
+@PromptServer.instance.routes.get(f"{API_PREFIX}/tag_cache")
+async def get_tag_cache_stats(request):
+    return web.json_response(TileTagCache.get_stats())
+
+
+@PromptServer.instance.routes.get(f"{API_PREFIX}/conditioning_cache")
+async def get_conditioning_cache_stats(request):
+    return web.json_response(ConditioningCache.get_stats())
+
+
 @PromptServer.instance.routes.get(f"{API_PREFIX}/series_selector")
 async def serve_series_selector(request):
     path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "web", "characters", "index.html")
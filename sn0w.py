@@ -5,15 +5,22 @@ Classes:
     ConfigReader: Handles reading and managing configuration settings.
     Logger: Logs messages with different severity levels and colors.
     Utility: Provides static methods for common operations.
+    FuzzyMatcher: Scores one query against many candidate strings by edit distance.
+    FuzzyIndex: Incrementally maintained q-gram index for edit distance lookups.
     MessageHolder: Manages communication between the JavaScript frontend and Python backend.
 """
 
 import os
+import copy
 import json
-import time
+import stat
 import torch
 import sqlite3
+import numpy as np
+import tempfile
 import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
 
 from server import PromptServer
 from aiohttp import web
@@ -31,24 +38,70 @@ class ConfigReader:
 
     is_comfy_portable()
         Check if comfy is running in portable mode.
+
+    get_cache_stats()
+        Return the hit/miss counters of the in-memory settings cache.
+
+    batch_update(path)
+        Collect setting changes and write them to disk once, atomically.
     """
 
     user_directory = folder_paths.get_user_directory()
     SETTINGS_PATH = os.path.join(user_directory, "default/comfy.settings.json")
 
+    # Process-wide snapshot of the settings file, reloaded only when its mtime or size changes
+    _settings_lock = threading.RLock()
+    _settings_cache = None
+    _settings_signature = None
+    _cache_stats = {"hits": 0, "misses": 0}
+
     @classmethod
     def print_sn0w(cls, message, color="\033[0;35m"):
         """Print a message with a specific color prefix."""
         print(f"{color}[sn0w] \033[0m{message}")
 
+    @classmethod
+    def _load_settings(cls):
+        """Return the cached settings, re-reading the file only when it changed on disk."""
+        settings_stat = os.stat(cls.SETTINGS_PATH)
+        signature = (settings_stat.st_mtime_ns, settings_stat.st_size)
+
+        with cls._settings_lock:
+            if cls._settings_cache is not None and cls._settings_signature == signature:
+                cls._cache_stats["hits"] += 1
+                return cls._settings_cache
+
+            cls._cache_stats["misses"] += 1
+            with open(cls.SETTINGS_PATH, "r", encoding="utf-8") as file:
+                settings = json.load(file)
+
+            cls._settings_cache = settings
+            cls._settings_signature = signature
+            return settings
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop the cached settings so the next read goes to disk."""
+        with cls._settings_lock:
+            cls._settings_cache = None
+            cls._settings_signature = None
+
+    @classmethod
+    def get_cache_stats(cls):
+        """Return the hit/miss counters of the settings cache."""
+        with cls._settings_lock:
+            return dict(cls._cache_stats)
+
     @staticmethod
     def get_setting(setting_id, default=None):
         """Retrieve a setting value from the configuration file."""
-        # Try to read the settings from the determined path
+        # Try to read the settings from the cached snapshot of the determined path
         try:
-            with open(ConfigReader.SETTINGS_PATH, "r", encoding="utf-8") as file:
-                settings = json.load(file)
-            return settings.get(setting_id, default)
+            value = ConfigReader._load_settings().get(setting_id, default)
+            # Hand out copies of mutable values so callers can't modify the shared snapshot
+            if isinstance(value, (list, dict)):
+                return copy.deepcopy(value)
+            return value
         except FileNotFoundError:
             ConfigReader.print_sn0w(f"Local configuration file not found at {ConfigReader.SETTINGS_PATH}.", "\033[0;33m")
         except json.JSONDecodeError:
@@ -57,29 +110,73 @@ class ConfigReader:
         return default
 
     @staticmethod
-    def set_setting(setting_id: str, value):
-        """Set a setting value in the configuration file."""
-        # Try to read the existing settings from the determined path
-        path = ConfigReader.SETTINGS_PATH
+    def get_file_mode(path):
+        """Get the permission bits of path, or the ones a new file would get (0o666 minus the umask) if it doesn't exist."""
+        try:
+            return stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            # The umask can only be read by setting it, so put it straight back
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
 
+    @staticmethod
+    def write_json_atomic(path, data):
+        """Write JSON to a temporary file next to path and rename it over the original, keeping its permissions."""
+        directory = os.path.dirname(path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
         try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            # mkstemp creates the file as 0600, which would otherwise replace the mode of the original
+            os.chmod(temp_path, ConfigReader.get_file_mode(path))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @classmethod
+    @contextmanager
+    def batch_update(cls, path=None):
+        """
+        Read-modify-write transaction over a JSON settings file.
+
+        Yields the parsed settings as a dict; any changes made to it are written back once
+        when the block exits without an error. Nothing is written if nothing changed.
+        """
+        path = path or cls.SETTINGS_PATH
+
+        with cls._settings_lock:
             if os.path.exists(path):
                 with open(path, "r", encoding="utf-8") as file:
-                    settings = json.load(file)
+                    original = json.load(file)
             else:
-                settings = {}  # If the file doesn't exist, start with an empty dict
+                original = {}  # If the file doesn't exist, start with an empty dict
 
-            # If value is None, remove the setting if it exists
-            if value is None:
-                if setting_id in settings:
-                    del settings[setting_id]
-            else:
-                # Update the setting value
-                settings[setting_id] = value
+            settings = copy.deepcopy(original)
+            yield settings
 
-            # Write the updated settings back to the file
-            with open(path, "w", encoding="utf-8") as file:
-                json.dump(settings, file, indent=4)
+            if settings != original:
+                cls.write_json_atomic(path, settings)
+                if path == cls.SETTINGS_PATH:
+                    cls.invalidate_cache()
+
+    @staticmethod
+    def set_setting(setting_id: str, value):
+        """Set a setting value in the configuration file."""
+        path = ConfigReader.SETTINGS_PATH
+
+        try:
+            with ConfigReader.batch_update() as settings:
+                # If value is None, remove the setting if it exists
+                if value is None:
+                    settings.pop(setting_id, None)
+                else:
+                    # Update the setting value
+                    settings[setting_id] = value
 
             return True
 
@@ -110,27 +207,25 @@ class ConfigReader:
             "sn0w.TextboxSettings": "SyntaxHighlighting.textbox-colors",
         }
 
-        path = ConfigReader.SETTINGS_PATH
-        with open(path, "r", encoding="utf-8") as file:
-            settings = json.load(file)
-
-        # Handle favorites migration
-        favorite_loras = cls.get_setting("sn0w.FavouriteLoras", [])
-        favorite_chars = cls.get_setting("sn0w.FavouriteCharacters", [])
+        # Apply every migration in a single transaction so the file is written at most once
+        with cls.batch_update() as settings:
+            # Handle favorites migration
+            favorite_loras = settings.get("sn0w.FavouriteLoras", [])
+            favorite_chars = settings.get("sn0w.FavouriteCharacters", [])
 
-        if favorite_loras or favorite_chars:
-            combined_favorites = list(set(favorite_loras + favorite_chars))  # Merge and remove duplicates
-            cls.set_setting("SyntaxHighlighting.favorites", combined_favorites)
-            cls.set_setting("sn0w.FavouriteLoras", None)  # Remove old setting
-            cls.set_setting("sn0w.FavouriteCharacters", None)  # Remove old setting
+            if favorite_loras or favorite_chars:
+                combined_favorites = list(set(favorite_loras + favorite_chars))  # Merge and remove duplicates
+                settings["SyntaxHighlighting.favorites"] = combined_favorites
+                settings.pop("sn0w.FavouriteLoras", None)  # Remove old setting
+                settings.pop("sn0w.FavouriteCharacters", None)  # Remove old setting
 
-        # Handle other setting migrations
-        for setting in settings:
-            if setting in conversion_map:
-                setting_value = cls.get_setting(setting)
-                if setting_value:
-                    cls.set_setting(conversion_map[setting], setting_value)
-                    cls.set_setting(setting, None)  # Remove the old setting
+            # Handle other setting migrations
+            for setting in list(settings):
+                if setting in conversion_map:
+                    setting_value = settings.get(setting)
+                    if setting_value:
+                        settings[conversion_map[setting]] = setting_value
+                        settings.pop(setting, None)  # Remove the old setting
 
 
 # Initialize portable check when the class is defined
@@ -220,6 +315,230 @@ class Logger:
             print(f"{len(sigmas) - 1:<5} | {sigmas[-1]:<11.4f} | {'N/A':<18} | {'N/A':<12}")
 
 
+class FuzzyMatcher:
+    """
+    Edit distance matching of one query against a fixed list of candidate strings.
+
+    Candidates are encoded once; each query is then scored against all of them with Myers'
+    bit-parallel algorithm, vectorized over candidates with NumPy. Candidates whose length
+    differs from the query by more than the cutoff are skipped without being scored.
+
+    Methods:
+    distances(query, max_distance, rows):
+        Edit distance from the query to every candidate (or only to rows), -1 where not scored or
+        the cutoff is exceeded.
+
+    best_match(query, max_distance):
+        Index and distance of the closest candidate within the cutoff, or None.
+    """
+
+    # Queries longer than this don't fit in a uint64 bit vector and fall back to Python ints
+    MAX_VECTOR_QUERY = 64
+
+    def __init__(self, candidates):
+        self.candidates = list(candidates)
+        self.lengths = np.fromiter((len(c) for c in self.candidates), dtype=np.int64, count=len(self.candidates))
+
+        max_length = int(self.lengths.max()) if len(self.candidates) else 0
+        self.codes = np.zeros((len(self.candidates), max_length), dtype=np.int64)
+        for i, candidate in enumerate(self.candidates):
+            self.codes[i, : len(candidate)] = [ord(ch) for ch in candidate]
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def distances(self, query, max_distance=None, rows=None):
+        """Return the edit distance to every candidate, with -1 for candidates beyond max_distance."""
+        result = np.full(len(self.candidates), -1, dtype=np.int64)
+        if not self.candidates:
+            return result
+
+        rows = np.arange(len(self.candidates)) if rows is None else np.asarray(rows, dtype=np.int64)
+        if max_distance is not None:
+            rows = rows[np.abs(self.lengths[rows] - len(query)) <= max_distance]
+        if rows.size == 0:
+            return result
+
+        if len(query) == 0:
+            result[rows] = self.lengths[rows]
+        elif len(query) <= self.MAX_VECTOR_QUERY:
+            result[rows] = self._myers_vectorized(query, rows)
+        else:
+            for row in rows:
+                result[row] = Utility.levenshtein_distance(query, self.candidates[row])
+
+        if max_distance is not None:
+            result[result > max_distance] = -1
+        return result
+
+    def best_match(self, query, max_distance=None):
+        """Return (index, distance) of the first closest candidate within max_distance, or None."""
+        distances = self.distances(query, max_distance)
+        valid = np.flatnonzero(distances >= 0)
+        if valid.size == 0:
+            return None
+
+        best = valid[np.argmin(distances[valid])]
+        return int(best), int(distances[best])
+
+    def _myers_vectorized(self, query, rows):
+        """Myers/Hyyrö bit-parallel edit distance of query against the selected candidate rows."""
+        lengths = self.lengths[rows]
+        width = int(lengths.max())
+        codes = self.codes[rows, :width]
+
+        # Pattern match vectors: bit i is set where query[i] equals the candidate character
+        peq = np.zeros(codes.shape, dtype=np.uint64)
+        for ch in set(query):
+            mask = sum(1 << i for i, q in enumerate(query) if q == ch)
+            peq[codes == ord(ch)] |= np.uint64(mask)
+
+        one = np.uint64(1)
+        last_bit = np.uint64(1 << (len(query) - 1))
+        vp = np.full(len(rows), (1 << len(query)) - 1, dtype=np.uint64)
+        vn = np.zeros(len(rows), dtype=np.uint64)
+        score = np.full(len(rows), len(query), dtype=np.int64)
+
+        for j in range(width):
+            x = peq[:, j] | vn
+            d0 = (((x & vp) + vp) ^ vp) | x
+            hp = vn | ~(d0 | vp)
+            hn = d0 & vp
+
+            # Only candidates that still have characters left contribute to the score
+            active = j < lengths
+            score += ((hp & last_bit) != 0) & active
+            score -= ((hn & last_bit) != 0) & active
+
+            hp = (hp << one) | one
+            hn = hn << one
+            vp = hn | ~(d0 | hp)
+            vn = hp & d0
+
+        return score
+
+
+class FuzzyIndex:
+    """
+    Q-gram inverted index over keyed strings for finding everything within an edit distance.
+
+    Entries can be added and removed one at a time, so the index survives changes to the
+    underlying list. A query only scores the entries that pass the length filter and the
+    q-gram count filter (strings within distance k share at least max(|a|, |b|) + q - 1 - k*q
+    padded q-grams), and verifies those with a FuzzyMatcher.
+
+    Methods:
+    update(mapping):
+        Sync the index with a {key: text} mapping, touching only added, removed or changed keys.
+
+    search(query, max_distance, keys):
+        {key: distance} for every entry (optionally restricted to keys) within max_distance.
+    """
+
+    Q = 3
+    PAD = "\0" * (Q - 1)
+
+    def __init__(self):
+        self._texts = {}
+        self._postings = defaultdict(set)
+        self._by_length = defaultdict(set)
+        self._matcher = None
+        self._matcher_keys = []
+        self._matcher_rows = {}
+
+    def __len__(self):
+        return len(self._texts)
+
+    @classmethod
+    def _qgram_tokens(cls, text):
+        """Padded q-grams of text, with repeats numbered so set overlap equals multiset overlap."""
+        padded = f"{cls.PAD}{text}{cls.PAD}"
+        seen = Counter()
+        tokens = []
+        for i in range(len(padded) - cls.Q + 1):
+            gram = padded[i : i + cls.Q]
+            seen[gram] += 1
+            tokens.append((gram, seen[gram]))
+        return tokens
+
+    def add(self, key, text):
+        """Add or replace a single entry."""
+        if key in self._texts:
+            if self._texts[key] == text:
+                return
+            self.remove(key)
+
+        self._texts[key] = text
+        self._by_length[len(text)].add(key)
+        for token in self._qgram_tokens(text):
+            self._postings[token].add(key)
+        self._matcher = None
+
+    def remove(self, key):
+        """Remove a single entry if present."""
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+
+        self._by_length[len(text)].discard(key)
+        for token in self._qgram_tokens(text):
+            postings = self._postings[token]
+            postings.discard(key)
+            if not postings:
+                del self._postings[token]
+        self._matcher = None
+
+    def update(self, mapping):
+        """Sync the index with a {key: text} mapping."""
+        for key in [key for key in self._texts if key not in mapping]:
+            self.remove(key)
+        for key, text in mapping.items():
+            self.add(key, text)
+
+    def _get_matcher(self):
+        # Re-encoded lazily, only after the entries changed
+        if self._matcher is None:
+            self._matcher_keys = list(self._texts)
+            self._matcher_rows = {key: row for row, key in enumerate(self._matcher_keys)}
+            self._matcher = FuzzyMatcher(self._texts[key] for key in self._matcher_keys)
+        return self._matcher
+
+    def candidates(self, query, max_distance):
+        """Return the keys that pass the length and q-gram count filters."""
+        shared = Counter()
+        for token in self._qgram_tokens(query):
+            shared.update(self._postings.get(token, ()))
+
+        low = max(0, len(query) - max_distance)
+        high = len(query) + max_distance
+        slack = self.Q - 1 - max_distance * self.Q
+
+        result = set()
+        for key, count in shared.items():
+            length = len(self._texts[key])
+            if low <= length <= high and count >= max(len(query), length) + slack:
+                result.add(key)
+
+        # Entries this short can be within the distance without sharing any q-gram
+        for length in range(low, high + 1):
+            if max(len(query), length) + slack <= 0:
+                result.update(self._by_length.get(length, ()))
+        return result
+
+    def search(self, query, max_distance, keys=None):
+        """Return {key: distance} for the entries within max_distance of the query."""
+        candidates = self.candidates(query, max_distance)
+        if keys is not None:
+            candidates.intersection_update(keys)
+        if not candidates:
+            return {}
+
+        matcher = self._get_matcher()
+        rows = [self._matcher_rows[key] for key in candidates]
+        distances = matcher.distances(query, max_distance, rows)
+        return {self._matcher_keys[row]: int(distances[row]) for row in rows if distances[row] >= 0}
+
+
 class Utility:
     """
     Utility class providing various static methods for common operations.
@@ -228,6 +547,12 @@ class Utility:
     levenshtein_distance(s1, s2):
         Calculate the Levenshtein distance between two strings.
 
+    levenshtein_within(s1, s2, max_distance):
+        Calculate the Levenshtein distance, or None as soon as it must exceed max_distance.
+
+    fuzzy_matcher(candidates):
+        Build a FuzzyMatcher for scoring queries against many candidates at once.
+
     image_batch(**kwargs):
         Concatenate and batch multiple image tensors.
 
@@ -253,23 +578,65 @@ class Utility:
     @staticmethod
     def levenshtein_distance(s1, s2):
         """Calculate the Levenshtein distance between two strings."""
+        return Utility.levenshtein_within(s1, s2, None)
+
+    @staticmethod
+    def levenshtein_within(s1, s2, max_distance):
+        """
+        Calculate the Levenshtein distance between two strings using Myers' bit-parallel algorithm.
+
+        Returns None once the distance is known to exceed max_distance (None disables the cutoff).
+        """
         if len(s1) < len(s2):
-            return Utility.levenshtein_distance(s2, s1)
+            s1, s2 = s2, s1
+
+        # The distance is at least the length difference
+        if max_distance is not None and len(s1) - len(s2) > max_distance:
+            return None
 
         if len(s2) == 0:
             return len(s1)
 
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
+        # Bit-parallel over the shorter string, one step per character of the longer one
+        peq = {}
+        for i, ch in enumerate(s2):
+            peq[ch] = peq.get(ch, 0) | (1 << i)
+
+        full = (1 << len(s2)) - 1
+        last_bit = 1 << (len(s2) - 1)
+        vp, vn = full, 0
+        score = len(s2)
+        remaining = len(s1)
+
+        for ch in s1:
+            x = peq.get(ch, 0) | vn
+            d0 = (((x & vp) + vp) ^ vp) | x
+            hp = vn | ~(d0 | vp)
+            hn = d0 & vp
+
+            if hp & last_bit:
+                score += 1
+            elif hn & last_bit:
+                score -= 1
+
+            # Each remaining character can lower the score by at most one
+            remaining -= 1
+            if max_distance is not None and score - remaining > max_distance:
+                return None
+
+            hp = (hp << 1) | 1
+            hn = hn << 1
+            vp = (hn | ~(d0 | hp)) & full
+            vn = hp & d0 & full
+
+        if max_distance is not None and score > max_distance:
+            return None
+        return score
 
-        return previous_row[-1]
+    @staticmethod
+    def fuzzy_matcher(candidates):
+        """Build a FuzzyMatcher over the given candidate strings."""
+        return FuzzyMatcher(candidates)
 
     @staticmethod
     def _check_image_dimensions(tensors, names):
@@ -384,44 +751,119 @@ class Cancelled(Exception):
     pass
 
 
+class _MessageWaiter:
+    """A single pending waitForMessage call, woken directly when its message arrives."""
+
+    def __init__(self, prompt_id):
+        self.event = threading.Event()
+        self.prompt_id = prompt_id
+        self.message = None
+        self.cancelled = False
+
+
 class MessageHolder:
     """
     Communicate between the JavaScript frontend and Python backend.
+
+    Each waiting node id gets its own event, so a message only wakes the waiter it is addressed to.
+    "__cancel__" cancels the waiters of the prompt ComfyUI is executing. If none is waiting yet, the next
+    wait of that same prompt raises Cancelled instead, once; a new prompt or "__start__" drops it.
     """
 
     stash = {}
     messages = {}
-    cancelled = False
     routes = PromptServer.instance.routes
     API_PREFIX = "/api/sn0w"
     logger = Logger()
 
+    _lock = threading.Lock()
+    _waiters = {}
+    # Prompt id a cancel is pending for, when it arrived with nobody waiting
+    _no_pending_cancel = object()
+    _pending_cancel = _no_pending_cancel
+
+    @staticmethod
+    def _get_prompt_id():
+        """Get the id of the prompt ComfyUI is executing, or None if the server doesn't expose it."""
+        return getattr(PromptServer.instance, "last_prompt_id", None)
+
+    @classmethod
+    def _wake_waiter(cls, waiter, message=None, cancelled=False):
+        waiter.message = message
+        waiter.cancelled = cancelled
+        waiter.event.set()
+
     @classmethod
     def addMessage(cls, id, message):
         """Add a message from the API."""
-        if message == "__cancel__":
-            cls.messages = {}
-            cls.cancelled = True
-        elif message == "__start__":
-            cls.messages = {}
-            cls.stash = {}
-            cls.cancelled = False
-        else:
-            cls.messages[str(id)] = message
+        with cls._lock:
+            if message == "__cancel__":
+                cls.messages = {}
+                prompt_id = cls._get_prompt_id()
+                woken = False
+                for waiters in cls._waiters.values():
+                    for waiter in waiters:
+                        if waiter.prompt_id == prompt_id:
+                            cls._wake_waiter(waiter, cancelled=True)
+                            woken = True
+                cls._waiters = {
+                    sid: pending for sid, waiters in cls._waiters.items() if (pending := [w for w in waiters if not w.event.is_set()])
+                }
+                cls._pending_cancel = cls._no_pending_cancel if woken else prompt_id
+            elif message == "__start__":
+                cls.messages = {}
+                cls.stash = {}
+                cls._pending_cancel = cls._no_pending_cancel
+            else:
+                sid = str(id)
+                # "-1" is addressed to whichever node is waiting
+                target = next(iter(cls._waiters), None) if sid == "-1" else sid
+
+                if target in cls._waiters:
+                    waiters = cls._waiters[target]
+                    cls._wake_waiter(waiters.pop(0), message)
+                    if not waiters:
+                        del cls._waiters[target]
+                else:
+                    cls.messages[sid] = message
 
     @classmethod
-    def waitForMessage(cls, id, period=0.1, asList=False):
-        """Wait for a message from the API."""
+    def waitForMessage(cls, id, timeout=None, asList=False):
+        """
+        Wait for a message from the API.
+
+        Raises Cancelled if the current prompt is cancelled, and TimeoutError if no message
+        arrives within timeout seconds (None waits indefinitely).
+        """
         sid = str(id)
-        while (sid not in cls.messages) and ("-1" not in cls.messages):
-            if cls.cancelled:
-                cls.cancelled = False
+        with cls._lock:
+            prompt_id = cls._get_prompt_id()
+            if cls._pending_cancel is not cls._no_pending_cancel:
+                cancelled = cls._pending_cancel == prompt_id
+                # Consumed by the first wait, and stale once another prompt runs
+                cls._pending_cancel = cls._no_pending_cancel
+                if cancelled:
+                    raise Cancelled()
+
+            message = cls.messages.pop(sid, None) or cls.messages.pop("-1", None)
+            if message is None:
+                waiter = _MessageWaiter(prompt_id)
+                cls._waiters.setdefault(sid, []).append(waiter)
+
+        if message is None:
+            if not waiter.event.wait(timeout):
+                with cls._lock:
+                    pending = cls._waiters.get(sid, [])
+                    if waiter in pending:
+                        pending.remove(waiter)
+                        if not pending:
+                            del cls._waiters[sid]
+                        raise TimeoutError(f"No message received for node {sid} within {timeout} seconds")
+
+            if waiter.cancelled:
                 raise Cancelled()
-            time.sleep(period)
-        if cls.cancelled:
-            cls.cancelled = False
-            raise Cancelled()
-        message = cls.messages.pop(str(id), None) or cls.messages.pop("-1")
+            message = waiter.message
+
         try:
             if asList:
                 return [int(x.strip()) for x in message.split(",")]
@@ -467,29 +909,20 @@ async def add_lora_loaders(request):
         if not isinstance(new_loaders, list):
             return web.json_response({"error": "Invalid input, expected a list."}, status=400)
 
-        # Read the existing JSON data from the file
-        if os.path.exists(json_path):
-            with open(json_path, "r") as file:
-                data = json.load(file)
-        else:
-            data = {}
-
-        # Initialize 'loraLoaders' if it doesn't exist in the JSON
-        if "loraLoaders" not in data:
-            data["loraLoaders"] = []
+        # Read, update and write the JSON data back in a single transaction
+        with ConfigReader.batch_update(json_path) as data:
+            # Initialize 'loraLoaders' if it doesn't exist in the JSON
+            if "loraLoaders" not in data:
+                data["loraLoaders"] = []
 
-        # Add only new loaders that are not already in the list
-        existing_loaders_set = set(tuple(loader) for loader in data["loraLoaders"])
-        new_unique_loaders = [loader for loader in new_loaders if tuple(loader) not in existing_loaders_set]
-        data["loraLoaders"].extend(new_unique_loaders)
+            # Add only new loaders that are not already in the list
+            existing_loaders_set = set(tuple(loader) for loader in data["loraLoaders"])
+            new_unique_loaders = [loader for loader in new_loaders if tuple(loader) not in existing_loaders_set]
+            data["loraLoaders"].extend(new_unique_loaders)
 
         if len(new_unique_loaders) == 0:
             return web.json_response({"message": "No new lora loaders added."})
 
-        # Write the updated JSON data back to the file
-        with open(json_path, "w") as file:
-            json.dump(data, file, indent=4)
-
         new_unique_loaders_str = "[" + ", ".join(str(loader) for loader in new_unique_loaders) + "]"
         return web.json_response({"message": f"Loaders added: {new_unique_loaders_str}"})
 
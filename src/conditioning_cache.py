@@ -0,0 +1,110 @@
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+from nodes import CLIPTextEncode
+
+from ..sn0w import Logger, ConfigReader
+
+
+class ConditioningCache:
+    """
+    Process wide cache of CLIP text conditionings.
+
+    Entries are keyed by (clip identity, prompt text), so the same prompt is only encoded once per CLIP object,
+    and evicted least recently used first once there are more than "sn0w.ConditioningSettings.CacheSize" of them
+    (0 disables the cache). A CLIP object is identified by a token tied to its lifetime rather than by id(), which
+    can be reused after it's garbage collected; its entries are dropped together with it.
+
+    Cached conditionings are shared between callers and must not be modified in place.
+
+    Methods:
+        encode(clip, text): Drop-in for CLIPTextEncode().encode(clip, text)[0].
+        get_stats(): Get hit/miss/eviction counters and the current number of entries.
+        clear(): Drop every cached conditioning.
+    """
+
+    DEFAULT_MAX_ENTRIES = 256
+
+    logger = Logger()
+    # Reentrant, the finalizer dropping a collected CLIP's entries can run while the lock is held
+    _lock = threading.RLock()
+    _entries = OrderedDict()
+    _clip_tokens = weakref.WeakKeyDictionary()
+    _next_token = itertools.count()
+    _stats = {"hits": 0, "misses": 0, "evictions": 0}
+    _text_encode = CLIPTextEncode()
+
+    @classmethod
+    def get_max_entries(cls):
+        try:
+            return max(0, int(ConfigReader.get_setting("sn0w.ConditioningSettings.CacheSize", cls.DEFAULT_MAX_ENTRIES)))
+        except (TypeError, ValueError):
+            return cls.DEFAULT_MAX_ENTRIES
+
+    @classmethod
+    def _get_clip_token(cls, clip):
+        """Get the token identifying a CLIP object, or None if it can't be tracked."""
+        try:
+            token = cls._clip_tokens.get(clip)
+            if token is None:
+                token = next(cls._next_token)
+                cls._clip_tokens[clip] = token
+                weakref.finalize(clip, cls._forget_clip, token)
+        except TypeError:
+            # Not weak referenceable, e.g. None
+            return None
+        return token
+
+    @classmethod
+    def _forget_clip(cls, token):
+        with cls._lock:
+            for key in [key for key in cls._entries if key[0] == token]:
+                del cls._entries[key]
+
+    @classmethod
+    def _evict(cls, max_entries):
+        while len(cls._entries) > max_entries:
+            cls._entries.popitem(last=False)
+            cls._stats["evictions"] += 1
+
+    @classmethod
+    def encode(cls, clip, text):
+        """Encode a prompt with a CLIP model, reusing the conditioning of an earlier identical call."""
+        max_entries = cls.get_max_entries()
+        if max_entries == 0:
+            return cls._text_encode.encode(clip, text)[0]
+
+        with cls._lock:
+            token = cls._get_clip_token(clip)
+            if token is None:
+                return cls._text_encode.encode(clip, text)[0]
+
+            key = (token, text)
+            conditioning = cls._entries.get(key)
+            if conditioning is not None:
+                cls._entries.move_to_end(key)
+                cls._stats["hits"] += 1
+                return conditioning
+            cls._stats["misses"] += 1
+
+        conditioning = cls._text_encode.encode(clip, text)[0]
+
+        with cls._lock:
+            cls._entries[key] = conditioning
+            cls._entries.move_to_end(key)
+            cls._evict(max_entries)
+        cls.logger.log(f"Conditioning cache: encoded {text[:64]!r}", "DEBUG")
+
+        return conditioning
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            return {**cls._stats, "entries": len(cls._entries), "max_entries": cls.get_max_entries()}
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
@@ -1,17 +1,15 @@
 from pathlib import Path
-from nodes import LoraLoader
-
-import os
-import folder_paths
 
 from ..sn0w import Logger, Utility, ConfigReader
+from .lora_catalog import LoraCatalog
+from .lora_weight_cache import LoraWeightCache
 
 
 def generate_lora_node_class(lora_type, required_folders=None, combos=1):
     """Generates a custom lora loader node"""
     try:
         # Get the list of filenames based on the lora_type
-        folder_paths.get_filename_list(lora_type)
+        LoraCatalog.get_loras(lora_type)
     except Exception:
         logger = Logger()
         logger.log(f"{lora_type} doesn't exist. Please add {lora_type} to extra_model_paths.yaml", "WARNING")
@@ -20,50 +18,25 @@ def generate_lora_node_class(lora_type, required_folders=None, combos=1):
     class DynamicLoraNode:
         logger = Logger()
 
-        @classmethod
-        def sort_loras(cls, loras, method="alphabetical"):
-            if method == "alphabetical":
-                sorted_loras = sorted(loras, key=lambda p: [part.lower() for part in Path(p).parts])
-            elif method == "last_changed":
-                sorted_loras = sorted(
-                    loras, key=lambda p: os.path.getmtime(folder_paths.get_full_path(lora_type, p)), reverse=True
-                )
-            else:
-                raise ValueError("Invalid sorting method. Choose either 'alphabetical' or 'last_changed'.")
-
-            return sorted_loras
-
         @classmethod
         def INPUT_TYPES(cls):
+            folder_key = lora_type
             try:
                 # Get the list of filenames based on the lora_type
-                loras = folder_paths.get_filename_list(lora_type)
+                LoraCatalog.get_loras(lora_type)
             except Exception:
                 cls.logger.log(
                     f"{lora_type} doesn't exist. Please add {lora_type} to extra_model_paths.yaml", "WARNING"
                 )
-                loras = folder_paths.get_filename_list("loras")
+                folder_key = "loras"
 
             sort_by = ConfigReader.get_setting("sn0w.LoraSettings.SortLorasBy", "alphabetical")
             remove_paths = ConfigReader.get_setting("sn0w.LoraSettings.RemoveLoraPath", False)
             if not isinstance(remove_paths, bool):
                 remove_paths = bool(remove_paths)
-            sorted_loras = cls.sort_loras(loras, sort_by)
-
-            if required_folders is not None:
-                # Normalize required_folders to handle subdirectory paths correctly
-                normalized_required_folders = [str(Path(folder)).lower() for folder in required_folders]
-
-                # Filter the sorted list to include paths that contain any of the required folder names
-                filtered_sorted_loras = [
-                    lora
-                    for lora in sorted_loras
-                    if any(
-                        required_folder in str(Path(lora)).lower() for required_folder in normalized_required_folders
-                    )
-                ]
-            else:
-                filtered_sorted_loras = sorted_loras
+
+            # Sorted and filtered views are served from the shared catalog
+            filtered_sorted_loras = LoraCatalog.get_filtered_loras(folder_key, required_folders, sort_by)
 
             if remove_paths:
                 filtered_sorted_loras = [Path(p).name for p in filtered_sorted_loras]
@@ -105,10 +78,8 @@ def generate_lora_node_class(lora_type, required_folders=None, combos=1):
             if lora == "None":
                 return (model, clip)
 
-            lora_loader = LoraLoader()
-            full_loras_list = folder_paths.get_filename_list("loras")
-            full_lora_path = next((full_path for full_path in full_loras_list if lora in full_path), None)
-            return lora_loader.load_lora(model, clip, full_lora_path, lora_strength, lora_strength)
+            full_lora_path = LoraCatalog.resolve_lora(lora, "loras")
+            return LoraWeightCache.load_lora(model, clip, full_lora_path, lora_strength, lora_strength)
 
         def find_lora(self, model, clip, **kwargs):
             if combos == 1:
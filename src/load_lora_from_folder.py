@@ -1,9 +1,9 @@
 import os
 import re
-import folder_paths
 
-from nodes import LoraLoader
-from ..sn0w import Logger, Utility, ConfigReader
+from ..sn0w import Logger, Utility, ConfigReader, FuzzyIndex
+from .lora_catalog import LoraCatalog
+from .lora_weight_cache import LoraWeightCache
 
 
 class LoadLoraFolderNode:
@@ -13,28 +13,12 @@ class LoadLoraFolderNode:
 
     logger = Logger()
     _lora_paths_cache = {"full": [], "typed": {}}
+    _lora_name_index = FuzzyIndex()
+    _indexed_lora_paths = []
 
     @classmethod
     def _build_lora_paths_cache(cls):
-        full_lora_paths = folder_paths.get_filename_list("loras")
-
-        typed_lora_paths = {}
-        folder_map = {
-            "SD15": "loras_15",
-            "SDXL": "loras_xl",
-            "SD3": "loras_3",
-            "VD": "loras_vd",
-        }
-
-        for model_type, folder_key in folder_map.items():
-            try:
-                typed_lora_paths[model_type] = folder_paths.get_filename_list(folder_key)
-            except Exception:
-                cls.logger.log(
-                    f'Correct lora folder path for "{folder_key}" doesnt exist. Falling back to the generic loras folder.',
-                    "WARNING",
-                )
-                typed_lora_paths[model_type] = full_lora_paths
+        full_lora_paths, typed_lora_paths = LoraCatalog.get_typed_loras()
 
         cls._lora_paths_cache = {
             "full": full_lora_paths,
@@ -42,6 +26,20 @@ class LoadLoraFolderNode:
         }
         return cls._lora_paths_cache
 
+    @staticmethod
+    def get_display_name(lora_filename):
+        return lora_filename.replace(".safetensors", "").replace("_", " ")
+
+    @classmethod
+    def _get_lora_name_index(cls, full_lora_paths):
+        """Return the name index, re-indexing only the files that changed since the last call."""
+        if full_lora_paths != cls._indexed_lora_paths:
+            cls._lora_name_index.update(
+                {path: cls.get_display_name(os.path.split(path)[-1].lower()) for path in full_lora_paths}
+            )
+            cls._indexed_lora_paths = list(full_lora_paths)
+        return cls._lora_name_index
+
     @classmethod
     def INPUT_TYPES(cls):
         cls._build_lora_paths_cache()
@@ -136,25 +134,30 @@ class LoadLoraFolderNode:
         # Pre-build a filename -> full_path lookup to avoid a nested search loop
         full_path_lookup = {os.path.split(p)[-1].lower(): p for p in full_lora_paths}
 
-        # Pre-process lora_paths once: resolve filenames, display names, and full paths
-        lora_entries = [
-            (lora_filename, lora_filename.replace(".safetensors", "").replace("_", " "), full_path)
-            for lora_path in lora_paths
-            for lora_filename in (os.path.split(lora_path)[-1].lower(),)
-            if (full_path := full_path_lookup.get(lora_filename)) is not None
-        ]
-
-        # Find the single best matching Lora candidate per prompt part
+        # Pre-process lora_paths once: resolve filenames and full paths, keeping the first position of each
+        lora_entries = {}
+        for lora_path in lora_paths:
+            lora_filename = os.path.split(lora_path)[-1].lower()
+            full_path = full_path_lookup.get(lora_filename)
+            if full_path is not None and full_path not in lora_entries:
+                lora_entries[full_path] = (len(lora_entries), lora_filename)
+
+        # Find the single best matching Lora candidate per prompt part, only scoring the
+        # candidates the name index can't rule out
+        name_index = self._get_lora_name_index(full_lora_paths)
         best_candidates = {}
         for prompt_part in prompt_parts:
-            for lora_filename, processed_name, full_path in lora_entries:
-                distance = Utility.levenshtein_distance(prompt_part, processed_name)
-                self.logger.log(f"Processing: Distance: {distance} Lora: {lora_filename} Tag: {prompt_part}", "DEBUG")
-                if distance > max_distance:
-                    continue
-                if prompt_part not in best_candidates or distance < best_candidates[prompt_part]["distance"]:
-                    best_candidates[prompt_part] = {"full_path": full_path, "distance": distance}
-                    self.logger.log(f"Final: Distance: {distance} Lora: {lora_filename} Tag: {prompt_part}", "DEBUG")
+            matches = name_index.search(prompt_part, max_distance, lora_entries.keys())
+            if not matches:
+                continue
+
+            # Ties go to the Lora that comes first in the folder listing
+            full_path = min(matches, key=lambda path: (matches[path], lora_entries[path][0]))
+            distance = matches[full_path]
+            lora_filename = lora_entries[full_path][1]
+            if prompt_part not in best_candidates or distance < best_candidates[prompt_part]["distance"]:
+                best_candidates[prompt_part] = {"full_path": full_path, "distance": distance}
+                self.logger.log(f"Final: Distance: {distance} Lora: {lora_filename} Tag: {prompt_part}", "DEBUG")
 
         # Load the best candidate Lora for each prompt part
         loaded_loras = set()
@@ -165,7 +168,7 @@ class LoadLoraFolderNode:
                 folder_name not in include_folders or len(loaded_loras) < include_folders[folder_name]
             ):
                 self.logger.log(f"Loading Lora: {os.path.split(candidate['full_path'])[-1]}", "INFORMATIONAL")
-                model, clip = LoraLoader().load_lora(model, clip, candidate["full_path"], lora_strength, lora_strength)
+                model, clip = LoraWeightCache.load_lora(model, clip, candidate["full_path"], lora_strength, lora_strength)
                 loaded_loras.add(candidate["full_path"])
 
         if not best_candidates:
@@ -0,0 +1,347 @@
+import os
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+import folder_paths
+
+from ..sn0w import Logger
+
+
+class LoraCatalog:
+    """
+    Shared, in-memory snapshot of every LoRA folder type.
+
+    Each folder type is listed once and then only re-listed when the modification time of one of
+    its directories changes. Directory mtimes are checked at most once per POLL_INTERVAL seconds,
+    so repeated /object_info requests are served from memory.
+
+    Methods:
+        get_loras(folder_key): Get the listing of a folder type.
+        get_typed_loras(): Get the listing of every model specific folder type, keyed by model type.
+        get_sorted_loras(folder_key, method): Get a sorted view of a folder type.
+        get_filtered_loras(folder_key, required_folders, method): Get a sorted view limited to some subfolders.
+        get_version(folder_key): Get a counter that increases every time a folder type is re-listed.
+        get_file_stats(folder_key): Get cached (mtime, size, added) metadata for every file of a folder type.
+        get_file_hash(folder_key, name): Get the sha256 of a file, cached until its metadata changes.
+        resolve_lora(name, folder_key): Resolve a file name, relative path or stem to an entry of the listing.
+        invalidate(folder_key): Force a folder type to be re-listed on next access.
+
+    Sorting methods:
+        alphabetical, last_changed (newest modification first), recently_added (newest file first).
+    """
+
+    FOLDER_MAP = {
+        "SD15": "loras_15",
+        "SDXL": "loras_xl",
+        "SD3": "loras_3",
+        "VD": "loras_vd",
+    }
+
+    # Minimum number of seconds between two directory mtime checks of the same folder type
+    POLL_INTERVAL = 2.0
+
+    logger = Logger()
+    _lock = threading.RLock()
+    _snapshots = {}
+    _last_version = 0
+
+    # Per directory stat metadata: {directory: {"mtime": dir mtime, "entries": {filename: (mtime, size, added)}}}
+    _dir_stats = {}
+    _hashes = {}
+
+    @classmethod
+    def _get_directory_mtimes(cls, folder_key):
+        """
+        Collect the mtime of every directory under the base folders of a folder type, empty ones included,
+        so a file added anywhere (like folder_paths itself tracks it) changes one of them.
+        """
+        mtimes = {}
+        for base in folder_paths.get_folder_paths(folder_key):
+            for directory, _, _ in os.walk(base, followlinks=True):
+                try:
+                    mtimes[os.path.normpath(directory)] = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+        return mtimes
+
+    @classmethod
+    def _is_stale(cls, snapshot):
+        for directory, mtime in snapshot["dir_mtimes"].items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    @classmethod
+    def _refresh(cls, folder_key):
+        """Return an up to date snapshot of a folder type, re-listing it only if it changed."""
+        with cls._lock:
+            snapshot = cls._snapshots.get(folder_key)
+            now = time.monotonic()
+            if snapshot is not None:
+                if now - snapshot["checked"] < cls.POLL_INTERVAL:
+                    return snapshot
+                # Only an actual check restarts the interval, frequent callers must not postpone it forever
+                snapshot["checked"] = now
+                if not cls._is_stale(snapshot):
+                    return snapshot
+
+            # Raises if the folder type isn't configured, same as folder_paths
+            files = list(folder_paths.get_filename_list(folder_key))
+            if snapshot is not None and files == snapshot["files"]:
+                # Something was touched but the listing is the same, keep the derived views
+                snapshot["dir_mtimes"] = cls._get_directory_mtimes(folder_key)
+                snapshot["checked"] = now
+                return snapshot
+
+            cls._last_version += 1
+            snapshot = {
+                "files": files,
+                "dir_mtimes": cls._get_directory_mtimes(folder_key),
+                "checked": now,
+                "version": cls._last_version,
+                "views": {},
+                # Keys of the views that depend on file times rather than just the listing
+                "timed_views": set(),
+            }
+            cls._snapshots[folder_key] = snapshot
+            cls.logger.log(f"Lora catalog: listed {len(files)} files for {folder_key}", "DEBUG")
+            return snapshot
+
+    @classmethod
+    def _get_view(cls, folder_key, view_key, build, timed=False):
+        """
+        Return a derived view of a folder type, built once per listing. Callers must not modify it.
+
+        Views built from file times (timed) are also rebuilt when one of the directories of the folder type is rescanned.
+        """
+        with cls._lock:
+            snapshot = cls._refresh(folder_key)
+            views = snapshot["views"]
+            if view_key not in views:
+                views[view_key] = build(snapshot["files"])
+                if timed:
+                    snapshot["timed_views"].add(view_key)
+            return views[view_key]
+
+    @classmethod
+    def get_loras(cls, folder_key="loras"):
+        """Get the listing of a folder type, raising like folder_paths if it isn't configured."""
+        return list(cls._refresh(folder_key)["files"])
+
+    @classmethod
+    def get_version(cls, folder_key="loras"):
+        """Get a number that changes every time the listing of a folder type changes."""
+        return cls._refresh(folder_key)["version"]
+
+    @classmethod
+    def get_typed_loras(cls):
+        """Get the listing of every model specific folder type, falling back to the generic loras folder."""
+        full_lora_paths = cls.get_loras("loras")
+
+        typed_lora_paths = {}
+        for model_type, folder_key in cls.FOLDER_MAP.items():
+            try:
+                typed_lora_paths[model_type] = cls.get_loras(folder_key)
+            except Exception:
+                cls.logger.log(
+                    f'Correct lora folder path for "{folder_key}" doesnt exist. Falling back to the generic loras folder.',
+                    "WARNING",
+                )
+                typed_lora_paths[model_type] = full_lora_paths
+
+        return full_lora_paths, typed_lora_paths
+
+    @classmethod
+    def _scan_directory(cls, directory):
+        """Return the stat metadata of the files in a directory, rescanning it only if its mtime changed."""
+        try:
+            dir_mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            cls._dir_stats.pop(directory, None)
+            return {}
+
+        cached = cls._dir_stats.get(directory)
+        if cached is not None and cached["mtime"] == dir_mtime:
+            return cached["entries"]
+
+        entries = {}
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                # Copied files can keep an old mtime, so the metadata change time also counts as "added"
+                entries[entry.name] = (stat.st_mtime, stat.st_size, max(stat.st_mtime, stat.st_ctime))
+
+        cls._dir_stats[directory] = {"mtime": dir_mtime, "entries": entries}
+
+        # Drop the views built from file times of the folder types listing this directory, they may be out of date now
+        for snapshot in cls._snapshots.values():
+            if directory in snapshot["dir_mtimes"]:
+                for key in snapshot["timed_views"]:
+                    snapshot["views"].pop(key, None)
+                snapshot["timed_views"] = set()
+        return entries
+
+    @classmethod
+    def get_file_stats(cls, folder_key="loras"):
+        """
+        Get {name: (mtime, size, added)} for every file of a folder type.
+
+        Directories are scanned in bulk with os.scandir and only rescanned when their own mtime
+        changes, so a warm call costs one stat per directory instead of one per file.
+        """
+        with cls._lock:
+            files = cls._refresh(folder_key)["files"]
+            bases = folder_paths.get_folder_paths(folder_key)
+
+            stats = {}
+            # Each directory is stat'ed (and rescanned if needed) at most once per call, however many files it holds
+            scanned = {}
+            for name in files:
+                relative_dir, filename = os.path.split(name)
+                # Same resolution order as folder_paths.get_full_path: the first base folder that has the file
+                for base in bases:
+                    directory = os.path.normpath(os.path.join(base, relative_dir))
+                    if directory not in scanned:
+                        scanned[directory] = cls._scan_directory(directory)
+                    entry = scanned[directory].get(filename)
+                    if entry is not None:
+                        stats[name] = entry
+                        break
+            return stats
+
+    @classmethod
+    def get_file_hash(cls, folder_key, name):
+        """Get the sha256 of a file, cached until its mtime or size changes."""
+        full_path = folder_paths.get_full_path(folder_key, name)
+        if full_path is None:
+            return None
+
+        stat = os.stat(full_path)
+        key = (full_path, stat.st_mtime_ns, stat.st_size)
+        with cls._lock:
+            if key in cls._hashes:
+                return cls._hashes[key]
+
+        sha256 = hashlib.sha256()
+        with open(full_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                sha256.update(chunk)
+
+        with cls._lock:
+            cls._hashes[key] = sha256.hexdigest()
+            return cls._hashes[key]
+
+    @classmethod
+    def get_sorted_loras(cls, folder_key="loras", method="alphabetical"):
+        """Get the listing of a folder type sorted alphabetically, by last change or by when it was added."""
+        if method == "alphabetical":
+            return list(
+                cls._get_view(
+                    folder_key,
+                    ("sorted", method),
+                    lambda files: sorted(files, key=lambda p: [part.lower() for part in Path(p).parts]),
+                )
+            )
+        if method in ("last_changed", "recently_added"):
+            field = 0 if method == "last_changed" else 2
+            with cls._lock:
+                stats = cls.get_file_stats(folder_key)
+                return list(
+                    cls._get_view(
+                        folder_key,
+                        ("sorted", method),
+                        lambda files: sorted(files, key=lambda p: stats[p][field] if p in stats else 0, reverse=True),
+                        timed=True,
+                    )
+                )
+        raise ValueError("Invalid sorting method. Choose either 'alphabetical', 'last_changed' or 'recently_added'.")
+
+    @classmethod
+    def get_recent_loras(cls, folder_key="loras", limit=None):
+        """Get the most recently added files of a folder type, newest first."""
+        recent = cls.get_sorted_loras(folder_key, "recently_added")
+        return recent if limit is None else recent[:limit]
+
+    @classmethod
+    def get_filtered_loras(cls, folder_key="loras", required_folders=None, method="alphabetical"):
+        """Get a sorted view of a folder type limited to paths containing any of the required folders."""
+        if required_folders is None:
+            return cls.get_sorted_loras(folder_key, method)
+
+        # Normalize required_folders to handle subdirectory paths correctly
+        normalized_required_folders = [str(Path(folder)).lower() for folder in required_folders]
+
+        def filter_loras(loras):
+            return [
+                lora
+                for lora in loras
+                if any(required_folder in str(Path(lora)).lower() for required_folder in normalized_required_folders)
+            ]
+
+        with cls._lock:
+            sorted_loras = cls.get_sorted_loras(folder_key, method)
+            return list(
+                cls._get_view(
+                    folder_key,
+                    ("filtered", method, tuple(normalized_required_folders)),
+                    lambda files: filter_loras(sorted_loras),
+                    timed=method != "alphabetical",
+                )
+            )
+
+    @staticmethod
+    def _resolution_order(name):
+        # Ambiguous names resolve to the least nested file, then case-insensitive alphabetical order
+        return (name.replace("\\", "/").count("/"), name.lower(), name)
+
+    @classmethod
+    def _build_resolver(cls, files):
+        """Map every trailing part of every relative path (with and without extension) to its file."""
+        by_suffix = {}
+        by_stem = {}
+        for name in files:
+            parts = name.replace("\\", "/").split("/")
+            for i in range(len(parts)):
+                suffix = "/".join(parts[i:])
+                by_suffix.setdefault(suffix, []).append(name)
+                by_stem.setdefault(os.path.splitext(suffix)[0], []).append(name)
+
+        return {
+            "suffix": {key: min(names, key=cls._resolution_order) for key, names in by_suffix.items()},
+            "stem": {key: min(names, key=cls._resolution_order) for key, names in by_stem.items()},
+        }
+
+    @classmethod
+    def resolve_lora(cls, name, folder_key="loras"):
+        """
+        Resolve a file name, relative path or stem to an entry of the listing of folder_key.
+
+        Exact path suffixes are matched first, then suffixes without an extension. Returns None if
+        nothing matches.
+        """
+        if not name:
+            return None
+
+        resolver = cls._get_view(folder_key, ("resolver",), cls._build_resolver)
+        key = name.replace("\\", "/").strip("/")
+        return resolver["suffix"].get(key) or resolver["stem"].get(key)
+
+    @classmethod
+    def invalidate(cls, folder_key=None):
+        """Force one folder type (or all of them) to be re-listed on next access."""
+        with cls._lock:
+            if folder_key is None:
+                cls._snapshots = {}
+                cls._dir_stats = {}
+            else:
+                cls._snapshots.pop(folder_key, None)
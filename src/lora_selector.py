@@ -1,5 +1,6 @@
 import os
-import folder_paths
+
+from .lora_catalog import LoraCatalog
 
 
 class LoraSelectorNode:
@@ -11,7 +12,7 @@ class LoraSelectorNode:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "lora": (["None"] + folder_paths.get_filename_list("loras"),),
+                "lora": (["None"] + LoraCatalog.get_loras("loras"),),
                 "lora_strength": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.01}),
                 "highest_lora": ("INT", {"default": 0, "min": 0}),
                 "total_loras": ("INT", {"default": 0, "min": 0}),
@@ -30,8 +31,8 @@ class LoraSelectorNode:
 
     def process_lora_strength(self, lora, lora_strength, highest_lora, total_loras, add_default_generation):
         # Get the list of lora filenames
-        lora_filenames = folder_paths.get_filename_list("loras")
-        lora_filenames = [os.path.basename(filename) for filename in lora_filenames]  # Extracting just the filename
+        lora_filenames = LoraCatalog.get_loras("loras")
+        lora_filenames = {os.path.basename(filename) for filename in lora_filenames}  # Extracting just the filename
 
         # Extract the lora string from the file path
         lora_string = os.path.splitext(os.path.basename(lora))[0]
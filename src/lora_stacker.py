@@ -1,19 +1,21 @@
 import os
-import folder_paths
+
+from .lora_catalog import LoraCatalog
 
 
 class LoraStackerNode:
     @classmethod
     def INPUT_TYPES(cls):
+        loras = ["None"] + LoraCatalog.get_loras("loras")
         return {
             "required": {
-                "lora_a": (["None"] + folder_paths.get_filename_list("loras"),),
+                "lora_a": (loras,),
                 "lora_strength_a": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.01}),
-                "lora_b": (["None"] + folder_paths.get_filename_list("loras"),),
+                "lora_b": (loras,),
                 "lora_strength_b": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.01}),
-                "lora_c": (["None"] + folder_paths.get_filename_list("loras"),),
+                "lora_c": (loras,),
                 "lora_strength_c": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.01}),
-                "lora_d": (["None"] + folder_paths.get_filename_list("loras"),),
+                "lora_d": (loras,),
                 "lora_strength_d": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.01}),
                 "add_default_generation": ("BOOLEAN", {"default": False}),
             },
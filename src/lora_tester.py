@@ -1,8 +1,10 @@
 import comfy.samplers
-import folder_paths
 
 from ..sn0w import Utility
-from nodes import KSampler, KSamplerAdvanced, VAEDecode, VAEEncode, EmptyLatentImage, LoraLoader, CLIPTextEncode
+from .lora_catalog import LoraCatalog
+from .lora_weight_cache import LoraWeightCache
+from .conditioning_cache import ConditioningCache
+from nodes import KSampler, KSamplerAdvanced, VAEDecode, VAEEncode, EmptyLatentImage
 from .upscale_with_model_by import UpscaleImageBy
 
 
@@ -62,14 +64,10 @@ class LoraTestNode:
         k_sampleradvanced_node = KSamplerAdvanced()
         vae_decode = VAEDecode()
         vae_encode = VAEEncode()
-        text_encode = CLIPTextEncode()
-        lora_loader = LoraLoader()
         upscaler = UpscaleImageBy()
 
         latent_image = EmptyLatentImage().generate(width, height)[0]
 
-        full_loras_list = folder_paths.get_filename_list("loras")
-
         loras = lora_info.split(";")
         images = []
 
@@ -88,21 +86,21 @@ class LoraTestNode:
                 lora_strength = float(parts[1])
 
                 # Find the full path of the lora
-                full_lora_path = next((full_path for full_path in full_loras_list if lora_name_suffix in full_path), None)
+                full_lora_path = LoraCatalog.resolve_lora(lora_name_suffix, "loras")
 
                 if full_lora_path:
-                    modified_model, modified_clip = lora_loader.load_lora(model, clip, full_lora_path, lora_strength, lora_strength)
+                    modified_model, modified_clip = LoraWeightCache.load_lora(model, clip, full_lora_path, lora_strength, lora_strength)
 
-                positive_prompt = text_encode.encode(modified_clip, positive)[0]
-                negative_prompt = text_encode.encode(modified_clip, negative)[0]
+                positive_prompt = ConditioningCache.encode(modified_clip, positive)
+                negative_prompt = ConditioningCache.encode(modified_clip, negative)
 
                 # Sampling
                 samples = k_sampler_node.sample(
                     modified_model, seed, steps, cfg, sampler_name, scheduler, positive_prompt, negative_prompt, latent_image, denoise
                 )[0]
             else:
-                positive_prompt = text_encode.encode(clip, positive)[0]
-                negative_prompt = text_encode.encode(clip, negative)[0]
+                positive_prompt = ConditioningCache.encode(clip, positive)
+                negative_prompt = ConditioningCache.encode(clip, negative)
 
                 # Sampling
                 samples = k_sampler_node.sample(
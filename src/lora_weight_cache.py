@@ -0,0 +1,113 @@
+import os
+import threading
+from collections import OrderedDict
+
+import comfy.sd
+import comfy.utils
+import folder_paths
+
+from ..sn0w import Logger, ConfigReader
+
+
+class LoraWeightCache:
+    """
+    Process wide cache of loaded lora state dicts.
+
+    Entries are keyed by (full path, mtime, size), so a replaced file is never served stale, and
+    evicted least recently used first once the total size exceeds the budget set in
+    "sn0w.LoraSettings.LoraCacheSize" (MB, 0 disables the cache).
+
+    Methods:
+        load_lora(model, clip, lora_name, strength_model, strength_clip): Drop-in for LoraLoader().load_lora.
+        get_lora(lora_name): Get the state dict of a lora, from the cache if possible.
+        get_stats(): Get hit/miss/eviction counters and the current cache size.
+        clear(): Drop every cached lora.
+    """
+
+    DEFAULT_BUDGET_MB = 2048
+
+    logger = Logger()
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+    _total_bytes = 0
+    _stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def get_budget_bytes(cls):
+        budget = ConfigReader.get_setting("sn0w.LoraSettings.LoraCacheSize", cls.DEFAULT_BUDGET_MB)
+        try:
+            return max(0, int(float(budget) * 1024 * 1024))
+        except (TypeError, ValueError):
+            return cls.DEFAULT_BUDGET_MB * 1024 * 1024
+
+    @staticmethod
+    def _state_dict_bytes(state_dict):
+        return sum(t.numel() * t.element_size() for t in state_dict.values() if hasattr(t, "element_size"))
+
+    @classmethod
+    def _evict(cls, budget):
+        while cls._entries and cls._total_bytes > budget:
+            key, (_, size) = cls._entries.popitem(last=False)
+            cls._total_bytes -= size
+            cls._stats["evictions"] += 1
+            cls.logger.log(f"Lora cache: evicted {os.path.basename(key[0])}", "DEBUG")
+
+    @classmethod
+    def get_lora(cls, lora_name):
+        """Get the state dict of a lora, reading it from disk only on a cache miss."""
+        lora_path = folder_paths.get_full_path("loras", lora_name)
+        if lora_path is None:
+            raise FileNotFoundError(f"Lora not found: {lora_name}")
+
+        stat = os.stat(lora_path)
+        key = (lora_path, stat.st_mtime_ns, stat.st_size)
+
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is not None:
+                cls._entries.move_to_end(key)
+                cls._stats["hits"] += 1
+                return entry[0]
+            cls._stats["misses"] += 1
+
+        lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
+
+        budget = cls.get_budget_bytes()
+        size = cls._state_dict_bytes(lora)
+        with cls._lock:
+            # Older versions of the same file can't be hit anymore
+            for stale in [k for k in cls._entries if k[0] == lora_path]:
+                cls._total_bytes -= cls._entries.pop(stale)[1]
+
+            if size <= budget:
+                cls._entries[key] = (lora, size)
+                cls._total_bytes += size
+            cls._evict(budget)
+
+        return lora
+
+    @classmethod
+    def load_lora(cls, model, clip, lora_name, strength_model, strength_clip):
+        """Apply a lora to the model and clip, same as LoraLoader().load_lora but with cached weights."""
+        if strength_model == 0 and strength_clip == 0:
+            return (model, clip)
+
+        lora = cls.get_lora(lora_name)
+        model_lora, clip_lora = comfy.sd.load_lora_for_models(model, clip, lora, strength_model, strength_clip)
+        return (model_lora, clip_lora)
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            return {
+                **cls._stats,
+                "entries": len(cls._entries),
+                "bytes": cls._total_bytes,
+                "budget_bytes": cls.get_budget_bytes(),
+            }
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._total_bytes = 0
@@ -1,11 +1,12 @@
 import torch
 import latent_preview
 import comfy.samplers
-from nodes import VAEDecode, EmptyLatentImage, CLIPTextEncode
+from nodes import VAEDecode, EmptyLatentImage
 from comfy.k_diffusion import sampling as k_diffusion_sampling
 from comfy_extras.nodes_align_your_steps import AlignYourStepsScheduler
 from ..sn0w import Logger, Utility
 from .custom_schedulers.custom_schedulers import CustomSchedulers
+from .conditioning_cache import ConditioningCache
 
 
 class Noise_EmptyNoise:
@@ -273,10 +274,9 @@ class SimpleSamplerCustom:
     ):
         custom_sampler = _SamplerCustom()
         vae_decode = VAEDecode()
-        text_encode = CLIPTextEncode()
 
-        positive_prompt = self.get_prompt("positive", text_encode, clip, kwargs)
-        negative_prompt = self.get_prompt("negative", text_encode, clip, kwargs)
+        positive_prompt = self.get_prompt("positive", clip, kwargs)
+        negative_prompt = self.get_prompt("negative", clip, kwargs)
         model_type = Utility.get_model_type_simple(model)
         image_output = Utility.get_node_output(kwargs["extra_info"], kwargs["id"], 0)
         latent_image = EmptyLatentImage().generate(width, height)[0]
@@ -331,10 +331,10 @@ class SimpleSamplerCustom:
     def get_custom_scheduler_defaults(self, scheduler):
         return {key: value[1] for key, value in self.custom_scheduler_defaults[scheduler].items()}
 
-    def get_prompt(self, name, text_encode, clip, kwargs):
+    def get_prompt(self, name, clip, kwargs):
         if name in kwargs and kwargs[name] is not None:
             if isinstance(kwargs[name], str):
-                return text_encode.encode(clip, kwargs[name])[0]
+                return ConditioningCache.encode(clip, kwargs[name])
             elif isinstance(kwargs[name], list):
                 return kwargs[name]
             else:
@@ -0,0 +1,170 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import folder_paths
+
+from ..sn0w import Logger, ConfigReader
+from .wd14.tagger import tag_batch
+
+
+class TileTagCache:
+    """
+    Content addressed cache of WD14 tags for upscaler tiles.
+
+    Entries are keyed by (hash of the tile pixels, tagger model, thresholds, exclude list, replace_underscore),
+    so re-running an upscale of the same image with other sampler settings skips tagging entirely.
+    The cache holds at most "sn0w.TaggerSettings.TagCacheSize" entries (0 disables it), evicting the least
+    recently used ones first, and is saved to PERSIST_PATH when "sn0w.TaggerSettings.PersistTagCache" is on.
+
+    Tiles are hashed exactly rather than perceptually: a tile that differs by a single pixel is tagged again
+    instead of risking the tags of a different image.
+
+    Methods:
+        get_tags(images, model, threshold, character_threshold, exclude_tags, replace_underscore): Tag a batch, cached.
+        hash_image(image): Get the content hash of an image tensor or array.
+        save(): Write the cache to disk if persistence is on and something changed.
+        get_stats(): Get hit/miss counters and the current number of entries.
+        clear(): Drop every cached entry, on disk too.
+    """
+
+    DEFAULT_MAX_ENTRIES = 4096
+    PERSIST_PATH = os.path.join(folder_paths.get_user_directory(), "sn0w_tag_cache.json")
+
+    logger = Logger()
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+    _loaded = False
+    _dirty = False
+    _stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def get_max_entries(cls):
+        try:
+            return max(0, int(ConfigReader.get_setting("sn0w.TaggerSettings.TagCacheSize", cls.DEFAULT_MAX_ENTRIES)))
+        except (TypeError, ValueError):
+            return cls.DEFAULT_MAX_ENTRIES
+
+    @staticmethod
+    def is_persistent():
+        return bool(ConfigReader.get_setting("sn0w.TaggerSettings.PersistTagCache", False))
+
+    @staticmethod
+    def hash_image(image):
+        """Hash the shape, dtype and pixels of an image tensor or array."""
+        if hasattr(image, "detach"):
+            image = image.detach().cpu().numpy()
+        array = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{array.shape}{array.dtype}".encode())
+        digest.update(array.data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(image_hash, model, threshold, character_threshold, exclude_tags, replace_underscore):
+        # A flat string so the key survives the round trip through JSON
+        return json.dumps([image_hash, model, float(threshold), float(character_threshold), exclude_tags, bool(replace_underscore)])
+
+    @classmethod
+    def _load(cls):
+        """Load the persisted entries once, the first time the cache is used with persistence on."""
+        if cls._loaded or not cls.is_persistent():
+            return
+        cls._loaded = True
+        try:
+            with open(cls.PERSIST_PATH, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            cls.logger.log(f"Tag cache: unable to read {cls.PERSIST_PATH}: {e}", "WARNING")
+            return
+
+        # Persisted in least to most recently used order; entries added before loading stay the most recent
+        for key, tags in entries:
+            if key not in cls._entries:
+                cls._entries[key] = tags
+                cls._entries.move_to_end(key, last=False)
+        cls._evict(cls.get_max_entries())
+
+    @classmethod
+    def _evict(cls, max_entries):
+        while len(cls._entries) > max_entries:
+            cls._entries.popitem(last=False)
+            cls._dirty = True
+
+    @classmethod
+    def get_tags(
+        cls,
+        images,
+        model,
+        threshold=0.35,
+        character_threshold=0.85,
+        exclude_tags="",
+        replace_underscore=True,
+    ):
+        """Tag a [N, H, W, 3] batch like tag_batch, only running the tagger for images that aren't cached yet."""
+        max_entries = cls.get_max_entries()
+        if max_entries == 0:
+            return tag_batch(images, model, threshold, character_threshold, exclude_tags, replace_underscore)
+
+        keys = [
+            cls.make_key(cls.hash_image(image), model, threshold, character_threshold, exclude_tags, replace_underscore)
+            for image in images
+        ]
+
+        results = [None] * len(keys)
+        with cls._lock:
+            cls._load()
+            for i, key in enumerate(keys):
+                if key in cls._entries:
+                    cls._entries.move_to_end(key)
+                    results[i] = cls._entries[key]
+            missing = [i for i, tags in enumerate(results) if tags is None]
+            cls._stats["hits"] += len(keys) - len(missing)
+            cls._stats["misses"] += len(missing)
+
+        if missing:
+            tags = tag_batch(images[missing], model, threshold, character_threshold, exclude_tags, replace_underscore)
+            with cls._lock:
+                for i, tag in zip(missing, tags):
+                    results[i] = tag
+                    cls._entries[keys[i]] = tag
+                    cls._entries.move_to_end(keys[i])
+                cls._dirty = True
+                cls._evict(max_entries)
+
+        return results
+
+    @classmethod
+    def save(cls):
+        """Write the cache to disk if persistence is on and it changed since the last save."""
+        if not cls.is_persistent():
+            return
+        with cls._lock:
+            cls._load()
+            if not cls._dirty:
+                return
+            entries = list(cls._entries.items())
+            cls._dirty = False
+
+        try:
+            ConfigReader.write_json_atomic(cls.PERSIST_PATH, entries)
+        except OSError as e:
+            cls.logger.log(f"Tag cache: unable to write {cls.PERSIST_PATH}: {e}", "WARNING")
+
+    @classmethod
+    def get_stats(cls):
+        with cls._lock:
+            return {**cls._stats, "entries": len(cls._entries), "max_entries": cls.get_max_entries()}
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._dirty = False
+            if os.path.exists(cls.PERSIST_PATH):
+                os.remove(cls.PERSIST_PATH)
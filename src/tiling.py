@@ -0,0 +1,347 @@
+import os
+import math
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import torch
+import folder_paths
+
+
+class Tiling:
+    """
+    Tile geometry and seam blending shared by tiled nodes.
+
+    A tile is a dict with "full_coords" (y_start, y_end, x_start, x_end), the area it covers including overlap,
+    and "base_coords", the area it owns. Blend masks fade each tile with a cosine^2 ramp from its full edges
+    to its base edges, and are memoized by tile shape, fades, device and dtype, so tiles with the same layout
+    share one mask.
+
+    Methods:
+        grid_tiles(height, width, num_parts, overlap): Near square grid of num_parts tiles.
+        plan_tiles(height, width, tile_size, overlap): Equal sized, latent aligned tiles of at most tile_size pixels.
+        describe_plan(plan): Get a one line summary of a tile plan.
+        split(image, tiles): Get the [B, h, w, C] view of every tile of an image.
+        get_blend_mask(full_coords, base_coords, height, width, device, dtype): Get the cached [h, w, 1] blend mask of a tile.
+        create_canvas(batch_size, channels, height, width, memmap): Create an empty canvas to blend tiles into.
+        accumulate(canvas, full_coords, base_coords, image): Blend one processed tile into a canvas.
+        normalize(canvas): Divide a canvas by its accumulated weights, in place.
+        blend(tiles, images, batch_size, channels, height, width, memmap): Accumulate and normalize in one call.
+    """
+
+    # Tile origins are aligned to one latent pixel, tile sizes to a multiple of TILE_SIZE_ALIGNMENT pixels
+    LATENT_ALIGNMENT = 8
+    TILE_SIZE_ALIGNMENT = 64
+
+    # Number of blend masks kept around, a grid only has a handful of distinct tile layouts
+    MAX_CACHED_MASKS = 64
+    # Number of 1-D fade ramps kept around, a mask is built from up to six of them
+    MAX_CACHED_RAMPS = 256
+
+    _lock = threading.Lock()
+    _fade_ramps = OrderedDict()
+    _masks = OrderedDict()
+
+    @staticmethod
+    def grid_tiles(height, width, num_parts, overlap_pixels):
+        """Lay out num_parts tiles on a near square grid, with overlap added only between tiles."""
+        # Calculate grid dimensions (trying to make it as square as possible)
+        grid_size = math.ceil(math.sqrt(num_parts))
+        rows = grid_size
+        cols = math.ceil(num_parts / rows)
+
+        # Calculate base part dimensions (non-overlapping)
+        part_height = height // rows
+        part_width = width // cols
+
+        tiles = []
+        for r in range(rows):
+            for c in range(cols):
+                if len(tiles) >= num_parts:
+                    return tiles
+
+                # Base coordinates (non-overlapping part)
+                base_y_start = r * part_height
+                base_y_end = min((r + 1) * part_height, height)
+                base_x_start = c * part_width
+                base_x_end = min((c + 1) * part_width, width)
+
+                # Full coordinates (with overlap), only add overlap where there's a neighbouring part
+                y_start = max(0, base_y_start - overlap_pixels) if r > 0 else base_y_start
+                y_end = min(height, base_y_end + overlap_pixels) if r < rows - 1 else base_y_end
+                x_start = max(0, base_x_start - overlap_pixels) if c > 0 else base_x_start
+                x_end = min(width, base_x_end + overlap_pixels) if c < cols - 1 else base_x_end
+
+                tiles.append(
+                    {
+                        "grid_pos": (c, r),
+                        "base_coords": (base_y_start, base_y_end, base_x_start, base_x_end),
+                        "full_coords": (y_start, y_end, x_start, x_end),
+                    }
+                )
+        return tiles
+
+    @classmethod
+    def plan_axis(cls, length, tile, overlap):
+        """
+        Place equally sized windows of at most tile pixels along an axis of length pixels, overlapping by at least
+        overlap.
+
+        Window origins are spread evenly and aligned to LATENT_ALIGNMENT, except the last one, which ends exactly at
+        the edge. Each pair of neighbours splits their shared area at its (aligned) middle, which becomes the base
+        boundary the blend masks fade around. Returns [(start, end, base_start, base_end)].
+        """
+        if length <= tile:
+            return [(0, length, 0, length)]
+
+        alignment = cls.LATENT_ALIGNMENT
+        overlap = min(overlap, tile - 2 * alignment)
+        # Rounding the origins to the latent grid can widen the step between two of them by up to one alignment,
+        # so that much is reserved on top of the overlap: every step stays at most tile - overlap
+        margin = overlap + alignment
+        count = max(2, math.ceil((length - margin) / (tile - margin)))
+        # Shrink the windows to the smallest aligned size that still covers the axis with this many of them
+        size_alignment = cls.TILE_SIZE_ALIGNMENT
+        tile = min(tile, math.ceil((length + (count - 1) * margin) / count / size_alignment) * size_alignment)
+        starts = [round(k * (length - tile) / (count - 1) / alignment) * alignment for k in range(count - 1)]
+        starts.append(length - tile)
+
+        # Base boundaries in the middle of each shared area, clamped inside it
+        boundaries = [0]
+        for k in range(count - 1):
+            shared_start, shared_end = starts[k + 1], starts[k] + tile
+            middle = round((shared_start + shared_end) / 2 / alignment) * alignment
+            boundaries.append(min(max(middle, shared_start), shared_end))
+        boundaries.append(length)
+
+        return [(start, start + tile, boundaries[k], boundaries[k + 1]) for k, start in enumerate(starts)]
+
+    @classmethod
+    def plan_tiles(cls, height, width, tile_size, overlap_pixels):
+        """Lay out a planned grid of equal sized tiles. Returns (tiles, plan), plan being a summary of the grid."""
+        rows = cls.plan_axis(height, tile_size, overlap_pixels)
+        cols = cls.plan_axis(width, tile_size, overlap_pixels)
+
+        tiles = [
+            {
+                "grid_pos": (c, r),
+                "base_coords": (base_y_start, base_y_end, base_x_start, base_x_end),
+                "full_coords": (y_start, y_end, x_start, x_end),
+            }
+            for r, (y_start, y_end, base_y_start, base_y_end) in enumerate(rows)
+            for c, (x_start, x_end, base_x_start, base_x_end) in enumerate(cols)
+        ]
+
+        plan = {
+            "image_size": (width, height),
+            "tile_size": (cols[0][1] - cols[0][0], rows[0][1] - rows[0][0]),
+            "grid": (len(cols), len(rows)),
+            "min_overlap": (
+                min((a[1] - b[0] for a, b in zip(cols, cols[1:])), default=0),
+                min((a[1] - b[0] for a, b in zip(rows, rows[1:])), default=0),
+            ),
+            "tiles": len(tiles),
+        }
+        return tiles, plan
+
+    @staticmethod
+    def describe_plan(plan):
+        width, height = plan["image_size"]
+        tile_width, tile_height = plan["tile_size"]
+        cols, rows = plan["grid"]
+        return (
+            f"Tile plan: {width}x{height} as {cols}x{rows} tiles of {tile_width}x{tile_height}, "
+            f"min overlap {plan['min_overlap'][0]}x{plan['min_overlap'][1]}px"
+        )
+
+    @staticmethod
+    def split(image, tiles):
+        """Add the [B, h, w, C] view of the image under every tile as its "image"."""
+        return [
+            {**tile, "image": image[:, tile["full_coords"][0] : tile["full_coords"][1], tile["full_coords"][2] : tile["full_coords"][3], :]}
+            for tile in tiles
+        ]
+
+    @staticmethod
+    def smooth_fade(x):
+        """
+        Creates an even smoother transition using cosine^2
+        x should be a float64 tensor of values between 0 and 1
+        Returns values between 0 and 1
+        """
+        cosine_val = 0.5 * (1 - torch.cos(math.pi * x))
+        # Square it for an even smoother transition
+        return cosine_val * cosine_val
+
+    @classmethod
+    def fade_ramp(cls, fade, length, kind, device):
+        """
+        Get the first length values of a fade over fade pixels, as a float32 tensor on device.
+
+        kind is "in" (0 to 1, positions computed in float32 like the original coordinate grids),
+        "out" (1 to 0) or "corner" (0 to 1, positions computed in float64).
+        """
+        key = (fade, length, kind, str(device))
+        ramp = cls._fade_ramps.get(key)
+        if ramp is not None:
+            cls._fade_ramps.move_to_end(key)
+        else:
+            if kind == "in":
+                positions = (torch.arange(length, dtype=torch.float32) / fade).clamp(0.0, 1.0).double()
+            elif kind == "out":
+                positions = 1.0 - torch.arange(length, dtype=torch.float64) / fade
+            else:
+                positions = torch.arange(length, dtype=torch.float64) / fade
+            ramp = cls.smooth_fade(positions).float().to(device)
+            cls._fade_ramps[key] = ramp
+            while len(cls._fade_ramps) > cls.MAX_CACHED_RAMPS:
+                cls._fade_ramps.popitem(last=False)
+        return ramp
+
+    @classmethod
+    def edge_profile(cls, size, fade_in, fade_out, fade_out_offset, device):
+        """
+        Get the (leading, trailing) fade factors along one axis of a tile, each a float32 tensor of size values.
+
+        fade_in is the overlap before the base area (faded 0 to 1 from the start), fade_out the overlap after it
+        (faded 1 to 0 from fade_out_offset). A side without overlap is all ones.
+        """
+        leading = torch.ones(size, device=device)
+        if fade_in > 0:
+            length = min(fade_in, size)
+            leading[:length] = cls.fade_ramp(fade_in, length, "in", device)
+
+        trailing = torch.ones(size, device=device)
+        if fade_out > 0:
+            length = max(0, min(fade_out, size, size - fade_out_offset))
+            trailing[fade_out_offset : fade_out_offset + length] = cls.fade_ramp(fade_out, length, "out", device)
+
+        return leading, trailing
+
+    @classmethod
+    def get_blend_mask(cls, full_coords, base_coords, height, width, device, dtype=torch.float32):
+        """
+        Get the [height, width, 1] blend mask of a tile, height and width being the part of it actually processed.
+
+        Masks are cached by (tile shape, fades on every side, device, dtype) and shared, callers must not modify them.
+        """
+        y_start, y_end, x_start, x_end = full_coords
+        base_y_start, base_y_end, base_x_start, base_x_end = base_coords
+        x_fades = (base_x_start - x_start, x_end - base_x_end, max(0, base_x_end - x_start))
+        y_fades = (base_y_start - y_start, y_end - base_y_end, max(0, base_y_end - y_start))
+
+        key = (height, width, x_fades, y_fades, str(device), dtype)
+        with cls._lock:
+            mask = cls._masks.get(key)
+            if mask is not None:
+                cls._masks.move_to_end(key)
+                return mask
+
+            # Fade on all sides where there's overlap, one 1-D profile per axis combined by broadcasting
+            x_profile = cls.edge_profile(width, *x_fades, device)
+            y_profile = cls.edge_profile(height, *y_fades, device)
+            mask = (x_profile[0].unsqueeze(0) * x_profile[1].unsqueeze(0)) * y_profile[0].unsqueeze(1)
+            mask = mask * y_profile[1].unsqueeze(1)
+
+            # Apply special handling for corners where two fades would multiply
+            # This prevents too much darkening in corners
+            if x_fades[0] > 0 and y_fades[0] > 0:
+                # Top-left corner: use max of individual fades rather than multiplication
+                y_fade = cls.fade_ramp(y_fades[0], min(y_fades[0], height), "corner", device)
+                x_fade = cls.fade_ramp(x_fades[0], min(x_fades[0], width), "corner", device)
+                mask[: len(y_fade), : len(x_fade)] = torch.maximum(y_fade.unsqueeze(1), x_fade.unsqueeze(0))
+
+            mask = mask.unsqueeze(-1).to(dtype)
+            cls._masks[key] = mask
+            while len(cls._masks) > cls.MAX_CACHED_MASKS:
+                cls._masks.popitem(last=False)
+            return mask
+
+    @staticmethod
+    def create_canvas(batch_size, channels, height, width, memmap=False):
+        """
+        Create an empty canvas. The result tensor is allocated by the first accumulated tile,
+        in a temporary memory mapped file when memmap is set.
+        """
+        return {"shape": (batch_size, height, width, channels), "memmap": memmap, "result": None, "weights": None}
+
+    @staticmethod
+    def _allocate_canvas(canvas, image):
+        batch_size, height, width, channels = canvas["shape"]
+        if canvas["memmap"]:
+            # ComfyUI deletes its temp folder on start and only creates it again when something needs it
+            temp_directory = folder_paths.get_temp_directory()
+            os.makedirs(temp_directory, exist_ok=True)
+            fd, path = tempfile.mkstemp(prefix="sn0w_canvas_", suffix=".bin", dir=temp_directory)
+            os.close(fd)
+            array = np.memmap(path, dtype=np.float32, mode="w+", shape=canvas["shape"])
+            try:
+                # The mapping stays valid without its file on POSIX
+                os.remove(path)
+            except OSError:
+                # A mapped file can't be removed on Windows, normalize removes it once the result is copied out
+                canvas["path"] = path
+            canvas["result"] = torch.from_numpy(array)
+        else:
+            canvas["result"] = torch.zeros(canvas["shape"], dtype=image.dtype, device=image.device)
+
+        # Weight mask to track contribution of each pixel (for proper blending), the same for every batch item
+        canvas["weights"] = torch.zeros((1, height, width, 1), dtype=torch.float32, device=canvas["result"].device)
+
+    @classmethod
+    def accumulate(cls, canvas, full_coords, base_coords, image):
+        """Blend one processed tile (all batch items) into the canvas with its fade mask."""
+        if canvas["result"] is None:
+            cls._allocate_canvas(canvas, image)
+        result, weights = canvas["result"], canvas["weights"]
+        image = image.to(result.device)
+
+        # Handle possible size mismatches between processed image and the expected section area
+        y_start, y_end, x_start, x_end = full_coords
+        height = min(y_end - y_start, image.shape[1])
+        width = min(x_end - x_start, image.shape[2])
+
+        weight_mask = cls.get_blend_mask(full_coords, base_coords, height, width, image.device)
+
+        # Weighted contribution of every batch item, the mask broadcasts over batch items and channels
+        result[:, y_start : y_start + height, x_start : x_start + width, :] += image[:, :height, :width, :] * weight_mask
+        weights[0, y_start : y_start + height, x_start : x_start + width, :] += weight_mask
+
+    @staticmethod
+    def normalize(canvas):
+        """
+        Divide the accumulated tiles by their total weight, in place when the dtypes allow it.
+
+        A memory mapped canvas whose file couldn't be removed up front is copied out of the mapping and its file removed.
+        """
+        result, weights = canvas["result"], canvas["weights"]
+
+        # Normalize by weights to get the final result (avoid division by zero)
+        epsilon = 1e-10
+        weights += epsilon
+        if result.dtype != weights.dtype:
+            result = result / weights
+        else:
+            # The weights broadcast over batch items and channels, no expanded copy needed
+            result = result.div_(weights)
+
+        path = canvas.pop("path", None)
+        if path is not None:
+            if result.data_ptr() == canvas["result"].data_ptr():
+                result = result.clone()
+            # Dropping the last references to the mapped tensor closes the mapping, so the file can go
+            canvas["result"] = canvas["weights"] = None
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return result
+
+    @classmethod
+    def blend(cls, tiles, images, batch_size, channels, height, width, memmap=False):
+        """Blend processed tiles into a new [B, height, width, C] image, images[i] being the result for tiles[i]."""
+        canvas = cls.create_canvas(batch_size, channels, height, width, memmap)
+        for tile, image in zip(tiles, images):
+            cls.accumulate(canvas, tile["full_coords"], tile["base_coords"], image)
+        return cls.normalize(canvas)
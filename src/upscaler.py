@@ -1,12 +1,16 @@
 from .upscale_with_model_by import UpscaleImageBy
 import torch
 import math
+import queue
+import contextlib
+import threading
 import comfy.utils
-import numpy as np
-from PIL import Image
+import comfy.model_management
 import comfy.samplers
-from nodes import KSampler, VAEEncode, VAEDecode, CLIPTextEncode
-from .wd14.tagger import tag as wd14_tag, wait_for_async
+from nodes import KSampler, VAEEncode, VAEDecode
+from .tile_tag_cache import TileTagCache
+from .tiling import Tiling
+from .conditioning_cache import ConditioningCache
 from ..sn0w import Logger
 
 
@@ -48,6 +52,19 @@ class AutoTaggedTiledUpscaler:
                 "character_threshold": ("FLOAT", {"default": 0.85, "min": 0.0, "max": 1.0, "step": 0.05}),
                 "exclude_tags": ("STRING", {"default": ""}),
             },
+            "optional": {
+                # Max images per VAE encode, sampler and VAE decode call, tiles of the same size are batched together
+                "tile_batch_size": ("INT", {"default": 1, "min": 1, "max": 64}),
+                # Tag the next tiles on a worker thread while the current ones are sampled
+                "pipelined": ("BOOLEAN", {"default": False}),
+                # Blend every part into the output as soon as it's decoded, optionally on a disk backed canvas
+                "low_memory_mode": (["disabled", "streaming", "streaming_memmap"], {"default": "disabled"}),
+                # split_parts: near square grid of split_parts parts. tile_size / vram: equal sized, latent aligned
+                # tiles of tile_size pixels, or as large as vram_budget_mb (0 = currently free VRAM) allows
+                "tile_planner": (["split_parts", "tile_size", "vram"], {"default": "split_parts"}),
+                "tile_size": ("INT", {"default": 1024, "min": 256, "max": 4096, "step": 64}),
+                "vram_budget_mb": ("INT", {"default": 0, "min": 0, "max": 262144, "step": 256}),
+            },
             "hidden": {
                 "prompt": "PROMPT",
                 "extra_pnginfo": "EXTRA_PNGINFO",
@@ -88,399 +105,339 @@ class AutoTaggedTiledUpscaler:
         exclude_tags="",
         prompt=None,
         extra_pnginfo=None,
+        tile_batch_size=1,
+        pipelined=False,
+        low_memory_mode="disabled",
+        tile_planner="split_parts",
+        tile_size=1024,
+        vram_budget_mb=0,
     ):
         upscaler = UpscaleImageBy()
         upscaled_image = upscaler.upscale(image, upscale_by, upscale_model)[0]
 
         batch_size, height, width, channels = upscaled_image.shape
 
-        # If no splitting is requested, return upscaled image as is
-        if split_parts <= 1:
-            return (upscaled_image,)
-
-        # Check the image dimensions to determine max number of splits
-        batch_size, height, width, channels = upscaled_image.shape  # Images in ComfyUI are [B,H,W,C]
-
-        # The latent space is usually 8x smaller in each dimension
-        # Calculate max parts based on minimum latent size requirements
-        latent_height = height // 8  # VAE downsampling factor
-        latent_width = width // 8
-
-        max_rows = max(1, latent_height // self.MIN_LATENT_SIZE)
-        max_cols = max(1, latent_width // self.MIN_LATENT_SIZE)
-        max_parts = max_rows * max_cols
-
-        # Adjust split_parts if needed to avoid parts that are too small
-        if split_parts > max_parts:
-            # Log warning and adjust split_parts
-            self.logger.log(
-                f"Reduced split_parts from {split_parts} to {max_parts} to maintain minimum latent size", "WARNING"
-            )
-            split_parts = max_parts
+        if tile_planner != "split_parts":
+            # Equal sized, latent aligned tiles sized from a target resolution or a VRAM budget
+            planned_size = self.get_planned_tile_size(tile_planner, tile_size, vram_budget_mb, batch_size)
+            split_info, plan = self.plan_tiles(upscaled_image, planned_size, overlap_pixels)
+            self.logger.log(Tiling.describe_plan(plan), "INFORMATIONAL")
+        else:
+            # If no splitting is requested, return upscaled image as is
+            if split_parts <= 1:
+                return (upscaled_image,)
+
+            # Check the image dimensions to determine max number of splits
+            batch_size, height, width, channels = upscaled_image.shape  # Images in ComfyUI are [B,H,W,C]
+
+            # The latent space is usually 8x smaller in each dimension
+            # Calculate max parts based on minimum latent size requirements
+            latent_height = height // 8  # VAE downsampling factor
+            latent_width = width // 8
+
+            max_rows = max(1, latent_height // self.MIN_LATENT_SIZE)
+            max_cols = max(1, latent_width // self.MIN_LATENT_SIZE)
+            max_parts = max_rows * max_cols
+
+            # Adjust split_parts if needed to avoid parts that are too small
+            if split_parts > max_parts:
+                # Log warning and adjust split_parts
+                self.logger.log(
+                    f"Reduced split_parts from {split_parts} to {max_parts} to maintain minimum latent size", "WARNING"
+                )
+                split_parts = max_parts
 
-        # Ensure split_parts is at least 1
-        split_parts = max(1, split_parts)
+            # Ensure split_parts is at least 1
+            split_parts = max(1, split_parts)
 
-        grid_size = math.ceil(math.sqrt(split_parts))
-        rows = grid_size
-        cols = math.ceil(split_parts / rows)
-        self.logger.log(f"Grid: {rows}x{cols}, {split_parts} parts, overlap: {overlap_pixels}px", "DEBUG")
+            grid_size = math.ceil(math.sqrt(split_parts))
+            rows = grid_size
+            cols = math.ceil(split_parts / rows)
+            self.logger.log(f"Grid: {rows}x{cols}, {split_parts} parts, overlap: {overlap_pixels}px", "DEBUG")
 
-        # Split the upscaled image with overlap
-        split_info = self.split_image(upscaled_image, split_parts, overlap_pixels)
+            # Split the upscaled image with overlap
+            split_info = self.split_image(upscaled_image, split_parts, overlap_pixels)
 
         # Process each split in stages to reduce model swapping:
         # 1. tag all images, 2. encode all prompts/latents, 3. sample all latents, 4. decode all images
-        processed_splits = []
         k_sampler = KSampler()
         vae_encode = VAEEncode()
         vae_decode = VAEDecode()
-        text_encode = CLIPTextEncode()
-
-        tagged_prompts = []
-        prompt_conditionings = []
-        latents = []
-        sampled_latents = []
 
         for i, part_data in enumerate(split_info):
             split_image = part_data["image"]  # Extract the actual image tensor
             b, h, w, c = split_image.shape
             self.logger.log(f"Part {i + 1}/{len(split_info)}: {w}x{h}", "DEBUG")
 
-        # Stage 1: tag every split first
-        for i, part_data in enumerate(split_info):
-            split_image = part_data["image"]
-            img_for_tagging = self.tensor_to_pil(split_image)
-
-            auto_tags = wait_for_async(
-                lambda: wd14_tag(
-                    img_for_tagging,
-                    tagger_model,
-                    threshold=tag_threshold,
-                    character_threshold=character_threshold,
-                    exclude_tags=exclude_tags,
-                    replace_underscore=True,
-                )
+        # Tiles of the same size are encoded, sampled and decoded together, up to tile_batch_size images per call
+        tile_groups = self.group_tiles(
+            [tuple(part_data["image"].shape[1:3]) for part_data in split_info], batch_size, tile_batch_size
+        )
+        self.logger.log(f"{len(split_info)} parts in {len(tile_groups)} batches", "DEBUG")
+
+        tagged_prompts = [None] * len(split_info)
+        prompt_conditionings = [None] * len(split_info)
+        latents = [None] * len(split_info)
+        sampled_latents = [None] * len(split_info)
+        processed_splits = [None] * len(split_info)
+        encoded_prompts = {}
+
+        def tag_part(i):
+            # Tagged straight from the tensor, all batch items at once.
+            # Tiles with the same pixels and tagger settings as an earlier run reuse its tags
+            auto_tags = TileTagCache.get_tags(
+                split_info[i]["image"],
+                tagger_model,
+                threshold=tag_threshold,
+                character_threshold=character_threshold,
+                exclude_tags=exclude_tags,
+                replace_underscore=True,
             )
 
-            combined_prompt = auto_tags
+            combined_prompts = auto_tags
             if positive and isinstance(positive, str) and positive.strip():
-                combined_prompt = f"{auto_tags}, {positive.strip()}"
+                combined_prompts = [f"{tags}, {positive.strip()}" for tags in auto_tags]
 
-            tagged_prompts.append(combined_prompt)
             self.logger.log(f"Tagged part {i + 1}/{len(split_info)}", "DEBUG")
-
-        # Stage 2: encode all prompts and images
-        for i, part_data in enumerate(split_info):
-            split_image = part_data["image"]
-            positive_conditioning = text_encode.encode(clip, tagged_prompts[i])[0]
-            latent = vae_encode.encode(vae, split_image)[0]
-
-            prompt_conditionings.append(positive_conditioning)
-            latents.append(latent)
-            self.logger.log(f"Encoded part {i + 1}/{len(split_info)}", "DEBUG")
-
-        # Stage 3: sample all latents
-        for i, latent in enumerate(latents):
-            processed_latent = k_sampler.sample(
+            return combined_prompts
+
+        def encode_prompts(i):
+            # Batch items that ended up with the same prompt share its conditioning
+            for prompt_text in tagged_prompts[i]:
+                if prompt_text not in encoded_prompts:
+                    encoded_prompts[prompt_text] = ConditioningCache.encode(clip, prompt_text)
+            prompt_conditionings[i] = [encoded_prompts[prompt_text] for prompt_text in tagged_prompts[i]]
+
+        def encode_group(group):
+            latent = vae_encode.encode(vae, torch.cat([split_info[i]["image"] for i in group]))[0]
+            for i, samples in zip(group, latent["samples"].split(batch_size)):
+                latents[i] = {"samples": samples}
+            self.logger.log(f"Encoded parts {', '.join(str(i + 1) for i in group)}/{len(split_info)}", "DEBUG")
+
+        def sample(positive_conditioning, latent_image):
+            return k_sampler.sample(
                 model=model,
                 seed=seed,
                 steps=steps,
                 cfg=cfg,
                 sampler_name=sampler_name,
                 scheduler=scheduler,
-                positive=prompt_conditionings[i],
+                positive=positive_conditioning,
                 negative=negative,
-                latent_image=latent,
+                latent_image=latent_image,
                 denoise=denoise,
             )[0]
 
-            sampled_latents.append(processed_latent)
-            self.logger.log(f"Sampled part {i + 1}/{len(latents)}", "DEBUG")
-
-        # Stage 4: decode all sampled latents
-        for i, sampled_latent in enumerate(sampled_latents):
-            processed_image = vae_decode.decode(vae, sampled_latent)[0]
-            processed_splits.append(processed_image)
-            self.logger.log(f"Decoded part {i + 1}/{len(sampled_latents)}", "DEBUG")
+        def sample_group(group):
+            # One sampler call per group when the conditionings can be stacked
+            positive_conditioning = self.batch_conditioning([c for i in group for c in prompt_conditionings[i]])
+            if positive_conditioning is not None:
+                processed = sample(positive_conditioning, {"samples": torch.cat([latents[i]["samples"] for i in group])})
+                for i, samples in zip(group, processed["samples"].split(batch_size)):
+                    sampled_latents[i] = {"samples": samples}
+            else:
+                for i in group:
+                    positive_conditioning = self.batch_conditioning(prompt_conditionings[i])
+                    if positive_conditioning is not None:
+                        sampled_latents[i] = sample(positive_conditioning, latents[i])
+                    else:
+                        # Conditionings that can't be stacked into a batch are sampled one batch item at a time
+                        samples = [
+                            sample(conditioning, {"samples": latents[i]["samples"][b : b + 1]})["samples"]
+                            for b, conditioning in enumerate(prompt_conditionings[i])
+                        ]
+                        sampled_latents[i] = {"samples": torch.cat(samples)}
+            self.logger.log(f"Sampled parts {', '.join(str(i + 1) for i in group)}/{len(split_info)}", "DEBUG")
+
+        def decode_group(group):
+            processed_image = vae_decode.decode(vae, {"samples": torch.cat([sampled_latents[i]["samples"] for i in group])})[0]
+            for i, image in zip(group, processed_image.split(batch_size)):
+                processed_splits[i] = image
+                # The latents aren't needed anymore once decoded
+                latents[i] = sampled_latents[i] = None
+            self.logger.log(f"Decoded parts {', '.join(str(i + 1) for i in group)}/{len(split_info)}", "DEBUG")
+
+        streaming = low_memory_mode in ("streaming", "streaming_memmap")
+        canvas = Tiling.create_canvas(batch_size, channels, height, width, memmap=low_memory_mode == "streaming_memmap")
+
+        if pipelined or streaming:
+            if pipelined:
+                # Tag upcoming groups on a worker thread while the current group is encoded, sampled and decoded
+                tagged_groups = self.prefetch_prompts(tile_groups, tag_part)
+            else:
+                tagged_groups = ((group, [tag_part(i) for i in group]) for group in tile_groups)
+
+            # Close the generator even if a stage raises, so the prefetch worker stops right away
+            with contextlib.closing(tagged_groups):
+                for group, prompts in tagged_groups:
+                    for i, combined_prompts in zip(group, prompts):
+                        tagged_prompts[i] = combined_prompts
+                        encode_prompts(i)
+                    encode_group(group)
+                    sample_group(group)
+                    decode_group(group)
+
+                    if streaming:
+                        # Blend the decoded parts into the canvas right away, so only one group is held at a time
+                        for i in group:
+                            part_data = split_info[i]
+                            Tiling.accumulate(canvas, part_data["full_coords"], part_data["base_coords"], processed_splits[i])
+                            processed_splits[i] = None
+            TileTagCache.save()
+        else:
+            # Stage 1: tag every split first, one prompt per batch item
+            for i in range(len(split_info)):
+                tagged_prompts[i] = tag_part(i)
+            TileTagCache.save()
+
+            # Stage 2: encode all prompts and images
+            for i in range(len(split_info)):
+                encode_prompts(i)
+            for group in tile_groups:
+                encode_group(group)
+
+            # Stage 3: sample all latents
+            for group in tile_groups:
+                sample_group(group)
+
+            # Stage 4: decode all sampled latents
+            for group in tile_groups:
+                decode_group(group)
+
+        if not streaming:
+            # Stitch the processed images back together with fade effect, using the coordinates they were split at
+            for part_data, processed_image in zip(split_info, processed_splits):
+                Tiling.accumulate(canvas, part_data["full_coords"], part_data["base_coords"], processed_image)
+
+        return (Tiling.normalize(canvas),)
+
+    # Number of tagged groups the pipelined mode keeps ready ahead of the group being sampled
+    PREFETCH_DEPTH = 2
 
-        # Stitch the processed images back together with fade effect
-        result = self.stitch_images(processed_splits, batch_size, channels, height, width, split_parts, overlap_pixels)
-        return (result,)
-
-    def tensor_to_pil(self, tensor):
-        """Convert a ComfyUI tensor to a PIL Image for tagging"""
-        # ComfyUI tensors are in the range [0, 1], so scale to [0, 255]
-        img_array = (tensor[0].cpu().numpy() * 255).astype(np.uint8)
-        return Image.fromarray(img_array)
+    @classmethod
+    def prefetch_prompts(cls, tile_groups, tag_part):
+        """
+        Yield (group, prompts of each tile) for every group, tagging the next groups on a worker thread.
+
+        At most PREFETCH_DEPTH tagged groups wait in the queue, so memory stays bounded however many tiles there are.
+        Errors raised while tagging are re-raised in the calling thread.
+        """
+        results = queue.Queue(maxsize=cls.PREFETCH_DEPTH)
+        stop = threading.Event()
+
+        def put(item):
+            # Give up when the consumer stopped, instead of blocking on a full queue forever
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker():
+            try:
+                for group in tile_groups:
+                    if not put((group, [tag_part(i) for i in group])):
+                        return
+            except BaseException as e:
+                put(e)
+
+        thread = threading.Thread(target=worker, name="sn0w_tile_tagger", daemon=True)
+        thread.start()
+        try:
+            for _ in tile_groups:
+                item = results.get()
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    @staticmethod
+    def group_tiles(tile_shapes, batch_size, tile_batch_size):
+        """
+        Group tile indices by tile shape, in order, so each group holds at most tile_batch_size images.
+
+        Every tile holds batch_size images, and a group always has at least one tile.
+        """
+        tiles_per_group = max(1, tile_batch_size // max(1, batch_size))
+        by_shape = {}
+        for i, shape in enumerate(tile_shapes):
+            by_shape.setdefault(shape, []).append(i)
+
+        groups = []
+        for indices in by_shape.values():
+            groups.extend(indices[start : start + tiles_per_group] for start in range(0, len(indices), tiles_per_group))
+        return groups
+
+    @staticmethod
+    def batch_conditioning(conditionings):
+        """
+        Stack one single prompt conditioning per batch item into a batched conditioning.
+
+        Token sequences of different lengths are repeated up to their least common multiple, the same way ComfyUI
+        batches conds, which leaves cross attention unchanged. Returns None if the conditionings can't be stacked.
+        """
+        first = conditionings[0]
+        if all(conditioning is first for conditioning in conditionings):
+            return first
+        if any(len(conditioning) != 1 for conditioning in conditionings):
+            return None
+
+        tensors = [conditioning[0][0] for conditioning in conditionings]
+        if any(t.shape[0] != 1 or t.shape[2:] != tensors[0].shape[2:] for t in tensors):
+            return None
+
+        options = {}
+        for key, value in first[0][1].items():
+            values = [conditioning[0][1].get(key) for conditioning in conditionings]
+            if key == "pooled_output" and all(v is not None for v in values):
+                options[key] = torch.cat(values)
+            elif torch.is_tensor(value):
+                # Unknown per prompt tensors can't be batched safely
+                return None
+            else:
+                options[key] = value
+
+        length = math.lcm(*(t.shape[1] for t in tensors))
+        cond = torch.cat([t.repeat(1, length // t.shape[1], *([1] * (t.dim() - 2))) for t in tensors])
+        return [[cond, options]]
+
+    # Rough sampling memory per pixel of one batch item, used to turn a VRAM budget into a tile size
+    VRAM_BYTES_PER_PIXEL = 4096
+    MIN_PLANNED_TILE_SIZE = 256
+    MAX_PLANNED_TILE_SIZE = 2048
+
+    def get_planned_tile_size(self, tile_planner, tile_size, vram_budget_mb, batch_size):
+        """Get the tile side length for the planner, from tile_size or from a VRAM budget (0 = free VRAM)."""
+        if tile_planner == "vram":
+            if vram_budget_mb > 0:
+                budget = vram_budget_mb * 1024 * 1024
+            else:
+                budget = comfy.model_management.get_free_memory(comfy.model_management.get_torch_device()) * 0.8
+            tile_size = math.sqrt(budget / (self.VRAM_BYTES_PER_PIXEL * max(1, batch_size)))
+            tile_size = min(max(tile_size, self.MIN_PLANNED_TILE_SIZE), self.MAX_PLANNED_TILE_SIZE)
+
+        alignment = Tiling.TILE_SIZE_ALIGNMENT
+        return max(alignment, int(tile_size) // alignment * alignment)
+
+    def plan_tiles(self, image, tile_size, overlap_pixels):
+        """Split an image into a planned grid of equal sized tiles. Returns (split_info, plan), see Tiling.plan_tiles."""
+        batch_size, height, width, channels = image.shape
+        tiles, plan = Tiling.plan_tiles(height, width, tile_size, overlap_pixels)
+        return Tiling.split(image, tiles), plan
 
     def split_image(self, image, num_parts, overlap_pixels):
         batch_size, height, width, channels = image.shape  # Use proper BHWC format
-        result_images = []
+        tiles = Tiling.grid_tiles(height, width, num_parts, overlap_pixels)
 
-        # Calculate grid dimensions (trying to make it as square as possible)
-        grid_size = math.ceil(math.sqrt(num_parts))
-        rows = grid_size
-        cols = math.ceil(num_parts / rows)
-
-        # Calculate part dimensions
-        part_height = height // rows
-        part_width = width // cols
+        base_y_start, base_y_end, base_x_start, base_x_end = tiles[0]["base_coords"]
+        part_width, part_height = base_x_end - base_x_start, base_y_end - base_y_start
         self.logger.log(f"Original Upscaled: {width}x{height}, part size: {part_width}x{part_height}", "INFORMATIONAL")
+        for i, tile in enumerate(tiles):
+            y_start, y_end, x_start, x_end = tile["full_coords"]
+            self.logger.log(f"Part {i + 1}: [{tile['grid_pos'][0]},{tile['grid_pos'][1]}], {x_end - x_start}x{y_end - y_start}", "DEBUG")
 
-        # Extract parts with proper handling of edges and corners
-        parts_created = 0
-        for r in range(rows):
-            if parts_created >= num_parts:
-                break
-
-            for c in range(cols):
-                if parts_created >= num_parts:
-                    break
-
-                # Base coordinates for this part
-                base_y_start = r * part_height
-                base_y_end = min((r + 1) * part_height, height)
-                base_x_start = c * part_width
-                base_x_end = min((c + 1) * part_width, width)
-
-                # Add overlap only where appropriate (don't go beyond borders)
-                # Top edge - only add overlap if not first row
-                y_start = base_y_start
-                if r > 0:
-                    y_start = max(0, base_y_start - overlap_pixels)
-
-                # Bottom edge - only add overlap if not last row
-                y_end = base_y_end
-                if r < rows - 1:
-                    y_end = min(height, base_y_end + overlap_pixels)
-
-                # Left edge - only add overlap if not first column
-                x_start = base_x_start
-                if c > 0:
-                    x_start = max(0, base_x_start - overlap_pixels)
-
-                # Right edge - only add overlap if not last column
-                x_end = base_x_end
-                if c < cols - 1:
-                    x_end = min(width, base_x_end + overlap_pixels)
-
-                # Extract part - making sure to keep all channels
-                # ComfyUI uses BHWC format [batch, height, width, channels]
-                part = image[:, y_start:y_end, x_start:x_end, :]
-
-                actual_width = x_end - x_start
-                actual_height = y_end - y_start
-                self.logger.log(f"Part {parts_created + 1}: [{c},{r}], {actual_width}x{actual_height}", "DEBUG")
-
-                # Store the part along with its position info for stitching
-                result_images.append(
-                    {
-                        "image": part,
-                        "base_coords": (base_y_start, base_y_end, base_x_start, base_x_end),
-                        "full_coords": (y_start, y_end, x_start, x_end),
-                    }
-                )
-
-                parts_created += 1
-                if parts_created >= num_parts:
-                    break
-
-        return result_images
-
-    def stitch_images(self, processed_images, batch_size, channels, orig_height, orig_width, num_parts, overlap_pixels):
-        # Create empty result tensor and weight mask for blending
-        result = torch.zeros(
-            (batch_size, orig_height, orig_width, channels),
-            dtype=processed_images[0].dtype,
-            device=processed_images[0].device,
-        )
-
-        # Weight mask to track contribution of each pixel (for proper blending)
-        weights = torch.zeros(
-            (batch_size, orig_height, orig_width, 1), dtype=torch.float32, device=processed_images[0].device
-        )
-
-        # Calculate grid dimensions
-        grid_size = math.ceil(math.sqrt(num_parts))
-        rows = grid_size
-        cols = math.ceil(num_parts / rows)
-
-        # Calculate base part dimensions (non-overlapping)
-        part_height = orig_height // rows
-        part_width = orig_width // cols
-
-        # Need to reconstruct the split part coordinates
-        parts_info = []
-        part_idx = 0
-
-        for r in range(rows):
-            if part_idx >= num_parts:
-                break
-
-            for c in range(cols):
-                if part_idx >= num_parts:
-                    break
-
-                # Base coordinates (non-overlapping part)
-                base_y_start = r * part_height
-                base_y_end = min((r + 1) * part_height, orig_height)
-                base_x_start = c * part_width
-                base_x_end = min((c + 1) * part_width, orig_width)
-
-                # Full coordinates (with overlap)
-                # Top edge - only add overlap if not first row
-                y_start = base_y_start
-                if r > 0:
-                    y_start = max(0, base_y_start - overlap_pixels)
-
-                # Bottom edge - only add overlap if not last row
-                y_end = base_y_end
-                if r < rows - 1:
-                    y_end = min(orig_height, base_y_end + overlap_pixels)
-
-                # Left edge - only add overlap if not first column
-                x_start = base_x_start
-                if c > 0:
-                    x_start = max(0, base_x_start - overlap_pixels)
-
-                # Right edge - only add overlap if not last column
-                x_end = base_x_end
-                if c < cols - 1:
-                    x_end = min(orig_width, base_x_end + overlap_pixels)
-
-                # Store position information for this part
-                parts_info.append(
-                    {
-                        "index": part_idx,
-                        "base": (base_y_start, base_y_end, base_x_start, base_x_end),
-                        "full": (y_start, y_end, x_start, x_end),
-                    }
-                )
-
-                part_idx += 1
-
-        # Helper function for smoother blending using cosine^2 fade
-        def smooth_fade(x):
-            """
-            Creates an even smoother transition using cosine^2
-            x should be between 0 and 1
-            Returns a value between 0 and 1
-            """
-            cosine_val = 0.5 * (1 - math.cos(math.pi * x))
-            # Square it for an even smoother transition
-            return cosine_val * cosine_val
-
-        # Now place each part with proper weight masks for blending
-        for part_info in parts_info:
-            idx = part_info["index"]
-            if idx >= len(processed_images):
-                continue
-
-            processed_img = processed_images[idx]
-
-            # Get the coordinates
-            y_start, y_end, x_start, x_end = part_info["full"]
-            base_y_start, base_y_end, base_x_start, base_x_end = part_info["base"]
-
-            # Create weight mask for fading
-            h_size = y_end - y_start
-            w_size = x_end - x_start
-
-            # Handle possible size mismatches between processed image and the expected section area
-            effective_h = min(h_size, processed_img.shape[1])
-            effective_w = min(w_size, processed_img.shape[2])
-
-            # Create weight mask starting with all 1s (full weight)
-            weight_mask = torch.ones((effective_h, effective_w, 1), device=processed_img.device)
-
-            # Create coordinate grids for more precise blending
-            y_coords = (
-                torch.arange(effective_h, device=processed_img.device).reshape(-1, 1, 1).repeat(1, effective_w, 1)
-            )
-            x_coords = (
-                torch.arange(effective_w, device=processed_img.device).reshape(1, -1, 1).repeat(effective_h, 1, 1)
-            )
-
-            # Apply blending on all sides where there's overlap
-            # Left edge fade
-            if x_start < base_x_start:
-                fade_width = base_x_start - x_start
-                left_mask = x_coords.float() / fade_width
-                left_mask = torch.clamp(left_mask, 0.0, 1.0)
-                # Apply smooth fade function to each position
-                for x in range(min(fade_width, effective_w)):
-                    mask_val = smooth_fade(left_mask[0, x, 0].item())
-                    weight_mask[:, x : x + 1, :] *= mask_val
-
-            # Right edge fade
-            if x_end > base_x_end:
-                fade_width = x_end - base_x_end
-                right_offset = base_x_end - x_start
-                if right_offset < 0:
-                    right_offset = 0
-
-                for x in range(min(fade_width, effective_w)):
-                    if right_offset + x < effective_w:
-                        pos = right_offset + x
-                        # Create reverse fade (1 to 0)
-                        mask_val = smooth_fade(1.0 - (x / fade_width))
-                        weight_mask[:, pos : pos + 1, :] *= mask_val
-
-            # Top edge fade
-            if y_start < base_y_start:
-                fade_height = base_y_start - y_start
-                top_mask = y_coords.float() / fade_height
-                top_mask = torch.clamp(top_mask, 0.0, 1.0)
-                # Apply smooth fade function to each position
-                for y in range(min(fade_height, effective_h)):
-                    mask_val = smooth_fade(top_mask[y, 0, 0].item())
-                    weight_mask[y : y + 1, :, :] *= mask_val
-
-            # Bottom edge fade
-            if y_end > base_y_end:
-                fade_height = y_end - base_y_end
-                bottom_offset = base_y_end - y_start
-                if bottom_offset < 0:
-                    bottom_offset = 0
-
-                for y in range(min(fade_height, effective_h)):
-                    if bottom_offset + y < effective_h:
-                        pos = bottom_offset + y
-                        # Create reverse fade (1 to 0)
-                        mask_val = smooth_fade(1.0 - (y / fade_height))
-                        weight_mask[pos : pos + 1, :, :] *= mask_val
-
-            # Apply special handling for corners where two fades would multiply
-            # This prevents too much darkening in corners
-            if x_start < base_x_start and y_start < base_y_start:
-                # Top-left corner: use max of individual fades rather than multiplication
-                corner_width = base_x_start - x_start
-                corner_height = base_y_start - y_start
-                for y in range(min(corner_height, effective_h)):
-                    for x in range(min(corner_width, effective_w)):
-                        # Get fade values for both directions
-                        y_fade = smooth_fade(y / corner_height)
-                        x_fade = smooth_fade(x / corner_width)
-                        # Use the stronger fade value (max) rather than multiplying them
-                        corner_fade = max(y_fade, x_fade)
-                        weight_mask[y, x, :] = corner_fade
-
-            # Extract the actual image slice to use
-            img_slice = processed_img[0, :effective_h, :effective_w, :]
-
-            # Expand the weight mask to match the number of channels
-            expanded_weight = weight_mask.expand(-1, -1, channels)
-
-            # Apply weighted contribution to result
-            result[0, y_start : y_start + effective_h, x_start : x_start + effective_w, :] += (
-                img_slice * expanded_weight
-            )
-            weights[0, y_start : y_start + effective_h, x_start : x_start + effective_w, :] += weight_mask
-
-        # Normalize by weights to get the final result (avoid division by zero)
-        epsilon = 1e-10
-        weights = weights.expand(-1, -1, -1, channels)  # Expand weights to match channels
-        normalized_result = result / (weights + epsilon)
-
-        return normalized_result
+        return Tiling.split(image, tiles)
@@ -6,14 +6,24 @@ import asyncio
 import aiohttp
 import numpy as np
 import csv
+import hashlib
 import os
+import platform
+import shutil
+import threading
+from collections import OrderedDict
 import onnxruntime as ort
+import torch
 from onnxruntime import InferenceSession
 from PIL import Image
 from server import PromptServer
 from aiohttp import web
 import folder_paths
 from tqdm import tqdm
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from ...sn0w import ConfigReader
 
 # Default config settings
 defaults = {
@@ -24,9 +34,15 @@ defaults = {
     "trailing_comma": False,
     "exclude_tags": "",
     "ortProviders": ["CPUExecutionProvider"],  # Changed to CPU-only by default
+    "session_cache_mb": 2048,  # Approximate memory cap for loaded InferenceSessions
+    "batch_size": 16,  # Images per session.run when tagging a batch
     "HF_ENDPOINT": "https://huggingface.co",
+    "mirror": "",  # Local directory or file:// URL to copy models from, overridden by WD14_MIRROR
 }
 
+# Streaming chunk size for model downloads and hashing
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 # Model definitions
 models = {
     "wd-eva02-large-tagger-v3": "{HF_ENDPOINT}/SmilingWolf/wd-eva02-large-tagger-v3",
@@ -56,7 +72,20 @@ else:
         os.makedirs(models_dir)
 
 print(f"WD14Tagger: Available ORT providers: {', '.join(ort.get_available_providers())}")
-print(f"WD14Tagger: Using ORT providers: {', '.join(defaults['ortProviders'])}")
+print(f"WD14Tagger: Default ORT providers: {', '.join(defaults['ortProviders'])}")
+
+
+def is_model_installed(model_name):
+    """
+    Check that both the ONNX model and its CSV labels are in the models folder.
+
+    Empty files and files with a pending .part download are left overs of an interrupted download and don't count.
+    """
+    for ext in (".onnx", ".csv"):
+        path = os.path.join(models_dir, model_name + ext)
+        if not os.path.isfile(path) or os.path.getsize(path) == 0 or os.path.exists(path + ".part"):
+            return False
+    return True
 
 
 def get_installed_models():
@@ -64,46 +93,340 @@ def get_installed_models():
     if not os.path.exists(models_dir):
         return []
     models_list = filter(lambda x: x.endswith(".onnx"), os.listdir(models_dir))
-    models_list = [m for m in models_list if os.path.exists(os.path.join(models_dir, os.path.splitext(m)[0] + ".csv"))]
+    models_list = [m for m in models_list if is_model_installed(os.path.splitext(m)[0])]
     return models_list
 
 
 known_models = list(models.keys())
 
+# Loaded InferenceSessions, least recently used first: {key: (session, approximate size in bytes)}
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+# ORT SessionOptions per execution profile, selected with the sn0w.TaggerSettings.ExecutionProfile setting
+EXECUTION_PROFILES = {
+    # ORT's own thread defaults with every graph optimization
+    "default": {"graph_optimization_level": "all"},
+    # One intra-op thread per logical core, for dedicated CPU inference machines
+    "throughput": {
+        "graph_optimization_level": "all",
+        "intra_op_num_threads": os.cpu_count() or 0,
+        "inter_op_num_threads": 1,
+        "execution_mode": "sequential",
+        "enable_cpu_mem_arena": True,
+    },
+    # No memory arena or memory pattern planning, at the cost of more allocations per run
+    "low_memory": {
+        "graph_optimization_level": "extended",
+        "enable_cpu_mem_arena": False,
+        "enable_mem_pattern": False,
+    },
+}
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
 
-async def download_to_file(url, destination, update_callback=None, session=None):
-    """Download a file from URL to the destination with progress tracking"""
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+
+_warned_providers = set()
+
+
+def get_providers():
+    """
+    Get the ORT providers to use, from the WD14_ORT_PROVIDERS environment variable, the sn0w.TaggerSettings.Providers
+    setting or defaults["ortProviders"], in that order. Providers this ORT build doesn't have are skipped.
+    """
+    configured = os.getenv("WD14_ORT_PROVIDERS") or ConfigReader.get_setting("sn0w.TaggerSettings.Providers", "")
+    providers = [p.strip() for p in configured.split(",") if p.strip()] if configured else list(defaults["ortProviders"])
+
+    available = ort.get_available_providers()
+    usable = [p for p in providers if p in available]
+    missing = [p for p in providers if p not in available and p not in _warned_providers]
+    if missing:
+        _warned_providers.update(missing)
+        print(f"WD14Tagger: Skipping unavailable ORT providers: {', '.join(missing)}")
+    return tuple(usable or ["CPUExecutionProvider"])
+
+
+def get_execution_profile():
+    """Get the SessionOptions of the configured execution profile, with the thread count settings applied on top."""
+    profile = os.getenv("WD14_ORT_PROFILE") or ConfigReader.get_setting("sn0w.TaggerSettings.ExecutionProfile", "default")
+    options = dict(EXECUTION_PROFILES.get(profile, EXECUTION_PROFILES["default"]))
+
+    for setting, name in (("IntraOpThreads", "intra_op_num_threads"), ("InterOpThreads", "inter_op_num_threads")):
+        threads = int(ConfigReader.get_setting(f"sn0w.TaggerSettings.{setting}", 0) or 0)
+        if threads > 0:
+            options[name] = threads
+    return options
+
+
+def build_session_options(options_key):
+    options = ort.SessionOptions()
+    for name, value in options_key:
+        if name == "graph_optimization_level":
+            value = GRAPH_OPTIMIZATION_LEVELS[value]
+        elif name == "execution_mode":
+            value = EXECUTION_MODES[value]
+        setattr(options, name, value)
+    return options
+
+
+def get_optimized_model_path(model_name, providers, options_key):
+    """Get the path of the optimized graph cached next to a model for these providers and options."""
+    # Fully optimized graphs can contain hardware specific operators, so the host and ORT version are part of the name
+    signature = repr((providers, options_key, ort.__version__, platform.machine()))
+    tag = hashlib.sha1(signature.encode()).hexdigest()[:12]
+    return os.path.join(models_dir, f"{model_name}.{tag}.onnx.optimized")
+
+
+def create_session(model_name, path, providers, options_key):
+    """
+    Create an InferenceSession, saving the optimized graph next to the model on first load and loading
+    that graph without re-optimizing it on later loads.
+    """
+    options = build_session_options(options_key)
+    level = dict(options_key).get("graph_optimization_level", "all")
+    if not ConfigReader.get_setting("sn0w.TaggerSettings.CacheOptimizedModel", True) or level == "disabled":
+        return InferenceSession(path, sess_options=options, providers=list(providers))
+
+    optimized_path = get_optimized_model_path(model_name, providers, options_key)
+    if os.path.exists(optimized_path) and os.path.getmtime(optimized_path) >= os.path.getmtime(path):
+        options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS["disabled"]
+        try:
+            return InferenceSession(optimized_path, sess_options=options, providers=list(providers))
+        except Exception as e:
+            print(f"WD14Tagger: Ignoring unusable optimized model {optimized_path}: {e}")
+            options = build_session_options(options_key)
+
+    temp_path = optimized_path + ".tmp"
+    options.optimized_model_filepath = temp_path
+    try:
+        session = InferenceSession(path, sess_options=options, providers=list(providers))
+        os.replace(temp_path, optimized_path)
+        return session
+    except Exception as e:
+        # e.g. a read-only models folder, or a model too big to serialize without external data
+        print(f"WD14Tagger: Unable to cache the optimized model for {model_name}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return InferenceSession(path, sess_options=build_session_options(options_key), providers=list(providers))
+
+
+def get_session(model_name, providers=None, session_options=None):
+    """
+    Get a cached InferenceSession for a model, creating it on first use.
+
+    providers and session_options default to the configured providers and execution profile.
+    Sessions are keyed by (model name, file mtime, providers, session options) and evicted least recently
+    used first once their combined size exceeds defaults["session_cache_mb"]. InferenceSession.run
+    is thread-safe, so the same session is shared by every caller.
+    """
+    path = os.path.join(models_dir, model_name + ".onnx")
+    providers = tuple(providers or get_providers())
+    options_key = tuple(sorted((get_execution_profile() if session_options is None else session_options).items()))
+    # A re-downloaded model file gets a new session
+    key = (model_name, os.stat(path).st_mtime_ns, providers, options_key)
+
+    with _sessions_lock:
+        if key in _sessions:
+            _sessions.move_to_end(key)
+            return _sessions[key][0]
+
+        session = create_session(model_name, path, providers, options_key)
+
+        # The loaded graph takes roughly as much memory as the model file
+        _sessions[key] = (session, os.path.getsize(path))
+        budget = defaults["session_cache_mb"] * 1024 * 1024
+        while len(_sessions) > 1 and sum(size for _, size in _sessions.values()) > budget:
+            _sessions.popitem(last=False)
+
+        return session
+
+
+def clear_sessions():
+    """Drop every cached InferenceSession."""
+    with _sessions_lock:
+        _sessions.clear()
+
+
+# Parsed label tables: {model_name: label table}, rebuilt when the CSV file changes
+_labels = {}
+_labels_lock = threading.Lock()
+
+
+def get_labels(model_name):
+    """
+    Get the parsed label table of a model, reading its CSV only once per file change.
+
+    The table holds the tag names as NumPy arrays (raw and with underscores replaced), their escaped
+    prompt variants, the index where the general and character categories start, and a cache of
+    exclusion masks keyed by (exclude_tags, replace_underscore).
+    """
+    path = os.path.join(models_dir, model_name + ".csv")
+    mtime = os.stat(path).st_mtime_ns
+
+    with _labels_lock:
+        labels = _labels.get(model_name)
+        if labels is not None and labels["mtime"] == mtime:
+            return labels
+
+        names = []
+        general_index = None
+        character_index = None
+        with open(path) as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                if general_index is None and row[2] == "0":
+                    general_index = reader.line_num - 2
+                elif character_index is None and row[2] == "4":
+                    character_index = reader.line_num - 2
+                names.append(row[1])
+
+        raw = np.array(names, dtype=object)
+        replaced = np.array([name.replace("_", " ") for name in names], dtype=object)
+        labels = {
+            "mtime": mtime,
+            "names": raw,
+            "display": {False: raw, True: replaced},
+            "escaped": {
+                False: np.array([name.replace("(", "\\(").replace(")", "\\)") for name in raw], dtype=object),
+                True: np.array([name.replace("(", "\\(").replace(")", "\\)") for name in replaced], dtype=object),
+            },
+            "general_index": general_index,
+            "character_index": character_index,
+            "exclusion_masks": OrderedDict(),
+        }
+        _labels[model_name] = labels
+        return labels
+
+
+def get_exclusion_mask(labels, exclude_tags, replace_underscore):
+    """Get a boolean mask of the labels whose display name is in the comma separated exclude_tags."""
+    key = (exclude_tags, bool(replace_underscore))
+    masks = labels["exclusion_masks"]
+    with _labels_lock:
+        if key in masks:
+            masks.move_to_end(key)
+            return masks[key]
+
+        remove = [s.strip() for s in exclude_tags.lower().split(",")]
+        mask = np.isin(labels["display"][bool(replace_underscore)], np.array(remove, dtype=object))
+        masks[key] = mask
+        # Exclude lists are usually typed by hand, only keep the recent ones
+        while len(masks) > 32:
+            masks.popitem(last=False)
+        return mask
+
+
+class DownloadVerificationError(Exception):
+    """A downloaded file doesn't have the expected size or sha256."""
+
+
+def hash_file(path, sha256=None):
+    """Feed a file to a sha256 object (a new one by default) and return it."""
+    sha256 = sha256 or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256
+
+
+def finalize_download(part, destination, expected_size=None, expected_sha256=None, sha256=None):
+    """Check the size and sha256 of a .part file, then atomically move it to its destination."""
+    size = os.path.getsize(part)
+    if expected_size is not None and size != expected_size:
+        os.remove(part)
+        raise DownloadVerificationError(f"{os.path.basename(destination)}: expected {expected_size} bytes, got {size}")
+
+    if expected_sha256:
+        digest = (sha256 or hash_file(part)).hexdigest()
+        if digest != expected_sha256.lower():
+            os.remove(part)
+            raise DownloadVerificationError(f"{os.path.basename(destination)}: sha256 mismatch ({digest})")
+
+    os.replace(part, destination)
+
+
+def get_linked_sha256(response):
+    """Get the sha256 HuggingFace reports for LFS files, looking through the redirects too."""
+    for r in (*response.history, response):
+        etag = r.headers.get("x-linked-etag", "").strip('"').lower()
+        if len(etag) == 64 and all(c in "0123456789abcdef" for c in etag):
+            return etag
+    return None
+
+
+async def download_to_file(url, destination, update_callback=None, session=None, expected_size=None, expected_sha256=None):
+    """
+    Download a file from URL to the destination with progress tracking.
+
+    The data is written to destination + ".part" and an existing .part file is resumed with an HTTP Range
+    request. The file is only moved to its destination once its size and sha256 (given, or reported by
+    HuggingFace) match.
+    """
     close_session = False
     if session is None:
         close_session = True
-        loop = None
-        try:
-            loop = asyncio.get_event_loop()
-        except:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        session = aiohttp.ClientSession(loop=loop)
+        session = aiohttp.ClientSession()
 
+    part = destination + ".part"
     try:
         proxy = os.getenv("HTTP_PROXY") or os.getenv("http_proxy")
         proxy_auth = None
         if proxy:
             proxy_auth = aiohttp.BasicAuth(os.getenv("PROXY_USER", ""), os.getenv("PROXY_PASS", ""))
 
-        async with session.get(url, proxy=proxy, proxy_auth=proxy_auth) as response:
-            size = int(response.headers.get("content-length", 0)) or None
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        # Content-Length and Range offsets only describe the file itself when the body isn't compressed
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        async with session.get(url, headers=headers, proxy=proxy, proxy_auth=proxy_auth) as response:
+            expected_sha256 = expected_sha256 or get_linked_sha256(response)
+            if response.status == 416 and offset:
+                # Nothing left to fetch, the .part file is already complete
+                finalize_download(part, destination, expected_size, expected_sha256)
+                return
+
+            response.raise_for_status()
+            encoded = response.headers.get("content-encoding", "identity").lower() != "identity"
+            if response.status != 206 or encoded:
+                # The server ignored the Range header, or encoded the body so offsets don't match the file, start over
+                offset = 0
+
+            # aiohttp decodes the body transparently, so an encoded Content-Length isn't the size of the file
+            size = None if encoded else int(response.headers.get("content-length", 0)) or None
+            if expected_size is None and size is not None:
+                expected_size = offset + size
+
+            sha256 = hashlib.sha256()
+            if offset and expected_sha256:
+                hash_file(part, sha256)
 
             with tqdm(
                 unit="B",
                 unit_scale=True,
                 miniters=1,
                 desc=url.split("/")[-1],
-                total=size,
+                total=expected_size,
+                initial=offset,
             ) as progressbar:
-                with open(destination, mode="wb") as f:
+                with open(part, mode="ab" if offset else "wb") as f:
                     perc = 0
-                    async for chunk in response.content.iter_chunked(2048):
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
                         f.write(chunk)
+                        sha256.update(chunk)
                         progressbar.update(len(chunk))
                         if update_callback is not None and progressbar.total is not None and progressbar.total != 0:
                             last = perc
@@ -111,21 +434,64 @@ async def download_to_file(url, destination, update_callback=None, session=None)
                             if perc != last:
                                 last = perc
                                 await update_callback(perc)
+
+        finalize_download(part, destination, expected_size, expected_sha256, sha256 if expected_sha256 else None)
     finally:
         if close_session and session is not None:
             await session.close()
 
 
+def get_mirror_dir():
+    """Get the local directory (plain path or file:// URL) models are copied from instead of HuggingFace, if any."""
+    mirror = os.getenv("WD14_MIRROR", defaults["mirror"])
+    if not mirror:
+        return None
+    if mirror.startswith("file://"):
+        mirror = url2pathname(urlparse(mirror).path)
+    return mirror
+
+
+async def copy_from_mirror(mirror, model, remote_name, destination):
+    """
+    Copy a model file from a local mirror, laid out either as <model>/<remote name> or <model>.onnx / <model>.csv.
+
+    A <file>.sha256 next to the source file is checked when present.
+    """
+    candidates = [
+        os.path.join(mirror, model, remote_name),
+        os.path.join(mirror, model + os.path.splitext(destination)[1]),
+    ]
+    source = next((c for c in candidates if os.path.isfile(c)), None)
+    if source is None:
+        raise FileNotFoundError(f"{remote_name} for {model} not found in mirror {mirror}")
+
+    expected_sha256 = None
+    if os.path.isfile(source + ".sha256"):
+        with open(source + ".sha256") as f:
+            expected_sha256 = f.read().split()[0]
+
+    part = destination + ".part"
+    await asyncio.to_thread(shutil.copyfile, source, part)
+    await asyncio.to_thread(finalize_download, part, destination, os.path.getsize(source), expected_sha256)
+
+
+# Single worker used to run coroutines when the calling thread already has a running event loop
+_async_executor = None
+
+
 def wait_for_async(async_fn):
+    """Run a coroutine function to completion from synchronous code. Only used for model downloads."""
+    global _async_executor
     try:
         import concurrent.futures
 
         # Check if we're in a running event loop
         asyncio.get_running_loop()
         # We're in a running loop, so run the async function in a separate thread
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(asyncio.run, async_fn())
-            return future.result()  # This blocks until complete
+        if _async_executor is None:
+            _async_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="wd14_async")
+        future = _async_executor.submit(asyncio.run, async_fn())
+        return future.result()  # This blocks until complete
     except RuntimeError:
         # No running loop, safe to use asyncio.run()
         return asyncio.run(async_fn())
@@ -142,80 +508,331 @@ def update_node_status(client_id, node, text, progress=None):
     PromptServer.instance.send_sync("status_update", {"node": node, "progress": progress, "text": text}, client_id)
 
 
-async def tag(
-    image,
-    model_name,
+def preprocess_image(image, height):
+    """Resize a PIL image to fit a height x height square, pad it with white and convert it to a BGR float32 array."""
+    # Reduce to max size and pad with white
+    ratio = float(height) / max(image.size)
+    new_size = tuple([int(x * ratio) for x in image.size])
+    image = image.resize(new_size, Image.LANCZOS)
+    square = Image.new("RGB", (height, height), (255, 255, 255))
+    square.paste(image, ((height - new_size[0]) // 2, (height - new_size[1]) // 2))
+
+    image = np.array(square).astype(np.float32)
+    return image[:, :, ::-1]  # RGB -> BGR
+
+
+# PIL's LANCZOS support and the fixed point precision of its 8 bit resampling
+LANCZOS_SUPPORT = 3.0
+RESAMPLE_PRECISION_BITS = 32 - 8 - 2
+# Output pixels per block of the banded resampling matrix
+RESAMPLE_BLOCK_SIZE = 32
+# Number of (input size, output size, device) resampling matrices kept around, least recently used evicted first
+MAX_CACHED_LANCZOS_WEIGHTS = 32
+
+_lanczos_weights = OrderedDict()
+_lanczos_lock = threading.Lock()
+
+
+def get_lanczos_weights(in_size, out_size, device):
+    """
+    Get the LANCZOS coefficients PIL uses to resize one axis of an 8 bit image from in_size to out_size pixels,
+    quantized to its fixed point precision.
+
+    The [out_size, in_size] matrix is banded, so it's returned as blocks of RESAMPLE_BLOCK_SIZE output pixels:
+    [(out_start, out_end, in_start, in_end, weights)], weights only covering the inputs the block reads.
+    """
+    key = (in_size, out_size, str(device))
+    with _lanczos_lock:
+        blocks = _lanczos_weights.get(key)
+        if blocks is not None:
+            _lanczos_weights.move_to_end(key)
+            return blocks
+
+        scale = in_size / out_size
+        filter_scale = max(scale, 1.0)
+        support = LANCZOS_SUPPORT * filter_scale
+
+        centers = (torch.arange(out_size, dtype=torch.float64) + 0.5) * scale
+        x_min = (centers - support + 0.5).trunc().clamp(min=0).long()
+        x_max = (centers + support + 0.5).trunc().clamp(max=in_size).long()
+
+        blocks = []
+        precision = 1 << RESAMPLE_PRECISION_BITS
+        for out_start in range(0, out_size, RESAMPLE_BLOCK_SIZE):
+            out_end = min(out_start + RESAMPLE_BLOCK_SIZE, out_size)
+            in_start, in_end = int(x_min[out_start]), int(x_max[out_end - 1])
+            block_centers = centers[out_start:out_end].unsqueeze(1)
+            x = torch.arange(in_start, in_end, dtype=torch.float64).unsqueeze(0)
+
+            t = (x - block_centers + 0.5) / filter_scale
+            weights = torch.sinc(t) * torch.sinc(t / LANCZOS_SUPPORT)
+            weights *= (t >= -LANCZOS_SUPPORT) & (t < LANCZOS_SUPPORT)
+            weights *= (x >= x_min[out_start:out_end].unsqueeze(1)) & (x < x_max[out_start:out_end].unsqueeze(1))
+            weights /= weights.sum(dim=1, keepdim=True)
+
+            # Rounded half away from zero, like normalize_coeffs_8bpc
+            weights = (weights * precision + torch.where(weights < 0, -0.5, 0.5)).trunc() / precision
+            blocks.append((out_start, out_end, in_start, in_end, weights.to(device)))
+
+        _lanczos_weights[key] = blocks
+        while len(_lanczos_weights) > MAX_CACHED_LANCZOS_WEIGHTS:
+            _lanczos_weights.popitem(last=False)
+    return blocks
+
+
+def resample_lanczos(pixels, new_h, new_w):
+    """
+    Resize a [N, C, H, W] float64 batch of 8 bit values like PIL's Image.resize with LANCZOS:
+    horizontal pass first, each pass rounded and clipped to 8 bit.
+    """
+    n, c, h, w = pixels.shape
+    if new_w != w:
+        blocks = get_lanczos_weights(w, new_w, pixels.device)
+        pixels = torch.cat([pixels[..., in_start:in_end] @ weights.T for _, _, in_start, in_end, weights in blocks], dim=-1)
+        pixels = (pixels + 0.5).floor().clamp(0, 255)
+    if new_h != h:
+        blocks = get_lanczos_weights(h, new_h, pixels.device)
+        pixels = torch.cat([weights @ pixels[..., in_start:in_end, :] for _, _, in_start, in_end, weights in blocks], dim=-2)
+        pixels = (pixels + 0.5).floor().clamp(0, 255)
+    return pixels
+
+
+def preprocess_tensor(images, height):
+    """
+    Batched, PIL free equivalent of preprocess_image for a [N, H, W, 3] tensor or array in 0..1.
+
+    The batch is quantized to 8 bit like the PIL path, resized on its own device with PIL's LANCZOS
+    coefficients and rounding, padded with white and flipped to BGR in one pass.
+    Returns a [N, height, height, 3] float32 array.
+    """
+    if not isinstance(images, torch.Tensor):
+        images = torch.from_numpy(np.asarray(images))
+    n, h, w, _ = images.shape
+
+    ratio = float(height) / max(w, h)
+    new_w, new_h = int(w * ratio), int(h * ratio)
+
+    # float64 keeps the fixed point sums of the resampling exact
+    pixels = (images[..., :3].float() * 255).floor().clamp(0, 255).double().permute(0, 3, 1, 2)
+    pixels = resample_lanczos(pixels, new_h, new_w).float()
+
+    # Reduce to max size and pad with white
+    square = torch.full((n, height, height, 3), 255.0, dtype=torch.float32, device=pixels.device)
+    top, left = (height - new_h) // 2, (height - new_w) // 2
+    square[:, top : top + new_h, left : left + new_w, :] = pixels.permute(0, 2, 3, 1).flip(-1)  # RGB -> BGR
+    return square.cpu().numpy()
+
+
+def get_batch_size(model, batch_size=None):
+    """Get the number of images to run per session.run, limited to 1 for models exported with a fixed batch size."""
+    fixed = model.get_inputs()[0].shape[0]
+    if isinstance(fixed, int) and fixed > 0:
+        return fixed
+    return max(1, int(batch_size or defaults["batch_size"]))
+
+
+def run_model(model, images, batch_size=None, progress_callback=None):
+    """
+    Run the model over a [N, H, W, 3] float32 array, batch_size images per session.run.
+
+    Returns the [N, labels] probabilities. progress_callback is called with the number of images done after each chunk.
+    """
+    input = model.get_inputs()[0]
+    label_name = model.get_outputs()[0].name
+    batch_size = get_batch_size(model, batch_size)
+
+    probs = []
+    for start in range(0, len(images), batch_size):
+        chunk = np.ascontiguousarray(images[start : start + batch_size])
+        probs.append(model.run([label_name], {input.name: chunk})[0])
+        if progress_callback is not None:
+            progress_callback(len(chunk))
+    return np.concatenate(probs)
+
+
+def format_tags(
+    labels,
+    probs,
     threshold=0.35,
     character_threshold=0.85,
     exclude_tags="",
     replace_underscore=True,
     trailing_comma=False,
-    client_id=None,
-    node=None,
 ):
-    """Tag an image with the WD14 tagger model"""
-    if model_name.endswith(".onnx"):
-        model_name = model_name[0:-5]
-    installed = list(get_installed_models())
-    if not any(model_name + ".onnx" in s for s in installed):
+    """Turn [N, labels] probabilities into one prompt string per row."""
+    # rating = probs[:, :general_index].argmax(axis=1)
+    general_index = labels["general_index"]
+    character_index = labels["character_index"]
+    general = np.zeros(probs.shape, dtype=bool)
+    general[:, general_index:character_index] = probs[:, general_index:character_index] > threshold
+    character = np.zeros_like(general)
+    character[:, character_index:] = probs[:, character_index:] > character_threshold
+
+    keep = ~get_exclusion_mask(labels, exclude_tags, replace_underscore)
+    general &= keep
+    character &= keep
+
+    # Character tags first, then general tags, each in label order
+    escaped = labels["escaped"][bool(replace_underscore)]
+    results = []
+    for row_character, row_general in zip(character, general):
+        all = np.concatenate((escaped[row_character], escaped[row_general])).tolist()
+        results.append(("" if trailing_comma else ", ").join((item + (", " if trailing_comma else "") for item in all)))
+    return results
+
+
+# Models known to be installed, so inference doesn't list the models folder on every call
+_ensured_models = set()
+_ensure_lock = threading.Lock()
+
+
+def normalize_model_name(model_name):
+    return model_name[0:-5] if model_name.endswith(".onnx") else model_name
+
+
+async def ensure_model(model_name, client_id=None, node=None):
+    """Download a model if it isn't installed yet. This is the only async step of tagging."""
+    model_name = normalize_model_name(model_name)
+    if model_name in _ensured_models and is_model_installed(model_name):
+        return model_name
+
+    if not is_model_installed(model_name):
         await download_model(model_name, client_id, node)
+    _ensured_models.add(model_name)
+    return model_name
 
-    name = os.path.join(models_dir, model_name + ".onnx")
-    model = InferenceSession(name, providers=defaults["ortProviders"])
 
-    input = model.get_inputs()[0]
-    height = input.shape[1]
+def ensure_model_sync(model_name, client_id=None, node=None):
+    """
+    Blocking version of ensure_model for node execution.
 
-    # Reduce to max size and pad with white
-    ratio = float(height) / max(image.size)
-    new_size = tuple([int(x * ratio) for x in image.size])
-    image = image.resize(new_size, Image.LANCZOS)
-    square = Image.new("RGB", (height, height), (255, 255, 255))
-    square.paste(image, ((height - new_size[0]) // 2, (height - new_size[1]) // 2))
+    An event loop is only involved when the model actually has to be downloaded, and concurrent callers
+    wait for a single download.
+    """
+    model_name = normalize_model_name(model_name)
+    if model_name in _ensured_models and is_model_installed(model_name):
+        return model_name
 
-    image = np.array(square).astype(np.float32)
-    image = image[:, :, ::-1]  # RGB -> BGR
-    image = np.expand_dims(image, 0)
-
-    # Read all tags from csv and locate start of each category
-    tags = []
-    general_index = None
-    character_index = None
-    with open(os.path.join(models_dir, model_name + ".csv")) as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            if general_index is None and row[2] == "0":
-                general_index = reader.line_num - 2
-            elif character_index is None and row[2] == "4":
-                character_index = reader.line_num - 2
-            if replace_underscore:
-                tags.append(row[1].replace("_", " "))
-            else:
-                tags.append(row[1])
+    with _ensure_lock:
+        return wait_for_async(lambda: ensure_model(model_name, client_id, node))
 
-    label_name = model.get_outputs()[0].name
-    probs = model.run([label_name], {input.name: image})[0]
 
-    result = list(zip(tags, probs[0]))
+def tag_images(
+    model_name,
+    batch,
+    threshold=0.35,
+    character_threshold=0.85,
+    exclude_tags="",
+    replace_underscore=True,
+    trailing_comma=False,
+    batch_size=None,
+    progress_callback=None,
+):
+    """Synchronous inference core: run an installed model over preprocessed images and format the tags."""
+    model = get_session(model_name)
+    probs = run_model(model, batch, batch_size, progress_callback)
+    return format_tags(
+        get_labels(model_name), probs, threshold, character_threshold, exclude_tags, replace_underscore, trailing_comma
+    )
 
-    # rating = max(result[:general_index], key=lambda x: x[1])
-    general = [item for item in result[general_index:character_index] if item[1] > threshold]
-    character = [item for item in result[character_index:] if item[1] > character_threshold]
 
-    all = character + general
-    remove = [s.strip() for s in exclude_tags.lower().split(",")]
-    all = [tag for tag in all if tag[0] not in remove]
+def get_model_height(model_name):
+    return get_session(model_name).get_inputs()[0].shape[1]
 
-    res = ("" if trailing_comma else ", ").join(
-        (item[0].replace("(", "\\(").replace(")", "\\)") + (", " if trailing_comma else "") for item in all)
+
+def tag_batch(
+    images,
+    model_name,
+    threshold=0.35,
+    character_threshold=0.85,
+    exclude_tags="",
+    replace_underscore=True,
+    trailing_comma=False,
+    batch_size=None,
+    progress_callback=None,
+):
+    """
+    Tag a batch of images with one session.run per batch_size images. Thread-safe.
+
+    images is a [N, H, W, 3] array or tensor with values in 0..1, as passed between ComfyUI nodes.
+    Returns one prompt string per image.
+    """
+    model_name = ensure_model_sync(model_name)
+    batch = preprocess_tensor(images, get_model_height(model_name))
+    return tag_images(
+        model_name,
+        batch,
+        threshold,
+        character_threshold,
+        exclude_tags,
+        replace_underscore,
+        trailing_comma,
+        batch_size,
+        progress_callback,
     )
 
-    return res
+
+def tag_sync(
+    image,
+    model_name,
+    threshold=0.35,
+    character_threshold=0.85,
+    exclude_tags="",
+    replace_underscore=True,
+    trailing_comma=False,
+):
+    """Tag a single PIL image, [H, W, 3] or [1, H, W, 3] image without going through an event loop. Thread-safe."""
+    if not isinstance(image, Image.Image):
+        images = image if len(image.shape) == 4 else image[None]
+        return tag_batch(
+            images[:1], model_name, threshold, character_threshold, exclude_tags, replace_underscore, trailing_comma
+        )[0]
+
+    model_name = ensure_model_sync(model_name)
+    batch = np.expand_dims(preprocess_image(image, get_model_height(model_name)), 0)
+    return tag_images(
+        model_name, batch, threshold, character_threshold, exclude_tags, replace_underscore, trailing_comma
+    )[0]
+
+
+async def tag(
+    image,
+    model_name,
+    threshold=0.35,
+    character_threshold=0.85,
+    exclude_tags="",
+    replace_underscore=True,
+    trailing_comma=False,
+    client_id=None,
+    node=None,
+):
+    """Tag an image with the WD14 tagger model"""
+    model_name = await ensure_model(model_name, client_id, node)
+
+    batch = np.expand_dims(preprocess_image(image, get_model_height(model_name)), 0)
+    return tag_images(
+        model_name, batch, threshold, character_threshold, exclude_tags, replace_underscore, trailing_comma
+    )[0]
 
 
 async def download_model(model, client_id, node):
-    """Download ONNX model and CSV file from HuggingFace"""
+    """
+    Download the ONNX model and CSV file from HuggingFace, or copy them from a local mirror.
+
+    Both files are fetched concurrently and only appear in the models folder once complete and verified.
+    """
+    files = [
+        ("model.onnx", os.path.join(models_dir, f"{model}.onnx")),
+        ("selected_tags.csv", os.path.join(models_dir, f"{model}.csv")),
+    ]
+
+    mirror = get_mirror_dir()
+    if mirror is not None:
+        update_node_status(client_id, node, f"Copying {model}", 0)
+        await asyncio.gather(*(copy_from_mirror(mirror, model, remote, local) for remote, local in files))
+        update_node_status(client_id, node, None)
+        return web.Response(status=200)
+
     hf_endpoint = os.getenv("HF_ENDPOINT", defaults["HF_ENDPOINT"])
     if not hf_endpoint.startswith("https://"):
         hf_endpoint = f"https://{hf_endpoint}"
@@ -225,7 +842,7 @@ async def download_model(model, client_id, node):
     url = models[model]
     url = url.replace("{HF_ENDPOINT}", hf_endpoint)
     url = f"{url}/resolve/main/"
-    async with aiohttp.ClientSession(loop=asyncio.get_event_loop()) as session:
+    async with aiohttp.ClientSession() as session:
 
         async def update_callback(perc):
             message = ""
@@ -234,15 +851,12 @@ async def download_model(model, client_id, node):
             update_node_status(client_id, node, message, perc)
 
         try:
-            await download_to_file(
-                f"{url}model.onnx", os.path.join(models_dir, f"{model}.onnx"), update_callback, session=session
-            )
-            await download_to_file(
-                f"{url}selected_tags.csv", os.path.join(models_dir, f"{model}.csv"), update_callback, session=session
+            await asyncio.gather(
+                *(download_to_file(f"{url}{remote}", local, update_callback, session=session) for remote, local in files)
             )
         except aiohttp.client_exceptions.ClientConnectorError as err:
             print(
-                "Unable to download model. Download files manually or try using a HF mirror/proxy website by setting the environment variable HF_ENDPOINT=https://....."
+                "Unable to download model. Download files manually, try using a HF mirror/proxy website by setting the environment variable HF_ENDPOINT=https://..... or point WD14_MIRROR at a local copy"
             )
             raise
 
@@ -268,7 +882,10 @@ class WD14Tagger:
                 "replace_underscore": ("BOOLEAN", {"default": defaults["replace_underscore"]}),
                 "trailing_comma": ("BOOLEAN", {"default": defaults["trailing_comma"]}),
                 "exclude_tags": ("STRING", {"default": defaults["exclude_tags"]}),
-            }
+            },
+            "optional": {
+                "batch_size": ("INT", {"default": defaults["batch_size"], "min": 1, "max": 256}),
+            },
         }
 
     RETURN_TYPES = ("STRING",)
@@ -287,20 +904,18 @@ class WD14Tagger:
         exclude_tags="",
         replace_underscore=False,
         trailing_comma=False,
+        batch_size=None,
     ):
-        tensor = image * 255
-        tensor = np.array(tensor, dtype=np.uint8)
-
-        pbar = comfy.utils.ProgressBar(tensor.shape[0])
-        tags = []
-        for i in range(tensor.shape[0]):
-            image = Image.fromarray(tensor[i])
-            tags.append(
-                wait_for_async(
-                    lambda: tag(
-                        image, model, threshold, character_threshold, exclude_tags, replace_underscore, trailing_comma
-                    )
-                )
-            )
-            pbar.update(1)
+        pbar = comfy.utils.ProgressBar(image.shape[0])
+        tags = tag_batch(
+            image,
+            model,
+            threshold,
+            character_threshold,
+            exclude_tags,
+            replace_underscore,
+            trailing_comma,
+            batch_size,
+            progress_callback=pbar.update,
+        )
         return (tags,)
@@ -0,0 +1,18 @@
+import { SettingUtils } from './sn0w.js';
+
+const conditioningSettingsDefinitions = [
+    {
+        id: 'sn0w.ConditioningSettings.CacheSize',
+        name: 'Conditioning Cache Size',
+        defaultValue: 256,
+        min: 0,
+        max: 4096,
+        step: 16,
+        type: 'slider',
+        tooltip: 'Number of encoded prompts kept per session, shared by the tiled upscaler, Sn0w KSampler and Lora Tester. 0 disables the cache.',
+    },
+]
+
+conditioningSettingsDefinitions.forEach((setting) => {
+    SettingUtils.registerSetting(setting);
+});
@@ -64,6 +64,7 @@ const loraSettingsDefinitions = [
         options: [
             { text: 'Alphabetical', value: 'alphabetical' },
             { text: 'Last Changed', value: 'last_changed' },
+            { text: 'Recently Added', value: 'recently_added' },
         ],
         type: 'combo',
         onChange: () => updateLoraSorting(app),
@@ -83,7 +84,17 @@ const loraSettingsDefinitions = [
         max: 20,
         step: 1,
         type: 'slider',
-    }
+    },
+    {
+        id: 'sn0w.LoraSettings.LoraCacheSize',
+        name: 'Lora Cache Size (MB)',
+        defaultValue: 2048,
+        min: 0,
+        max: 65536,
+        step: 256,
+        type: 'slider',
+        tooltip: 'Amount of RAM used to keep loaded loras around between generations. 0 disables the cache.',
+    },
 ]
 
 const sn0wSettings = await fetchExtensionSettings();
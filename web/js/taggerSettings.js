@@ -0,0 +1,71 @@
+import { SettingUtils } from './sn0w.js';
+
+const taggerSettingsDefinitions = [
+    {
+        id: 'sn0w.TaggerSettings.ExecutionProfile',
+        name: 'WD14 Tagger Execution Profile',
+        defaultValue: "default",
+        options: [
+            { text: 'Default', value: 'default' },
+            { text: 'Throughput (one thread per core)', value: 'throughput' },
+            { text: 'Low Memory', value: 'low_memory' },
+        ],
+        type: 'combo',
+        tooltip: 'ONNX Runtime options used for new tagger sessions. Can be overridden with the WD14_ORT_PROFILE environment variable.',
+    },
+    {
+        id: 'sn0w.TaggerSettings.IntraOpThreads',
+        name: 'WD14 Tagger Intra-Op Threads',
+        defaultValue: 0,
+        min: 0,
+        max: 256,
+        step: 1,
+        type: 'slider',
+        tooltip: 'Threads used inside a single operator. 0 uses the execution profile value.',
+    },
+    {
+        id: 'sn0w.TaggerSettings.InterOpThreads',
+        name: 'WD14 Tagger Inter-Op Threads',
+        defaultValue: 0,
+        min: 0,
+        max: 64,
+        step: 1,
+        type: 'slider',
+        tooltip: 'Threads used to run independent operators in parallel. 0 uses the execution profile value.',
+    },
+    {
+        id: 'sn0w.TaggerSettings.Providers',
+        name: 'WD14 Tagger ORT Providers',
+        defaultValue: "",
+        type: 'text',
+        tooltip: 'Comma separated ONNX Runtime providers, e.g. CUDAExecutionProvider,CPUExecutionProvider. Empty uses CPU only. Can be overridden with the WD14_ORT_PROVIDERS environment variable.',
+    },
+    {
+        id: 'sn0w.TaggerSettings.CacheOptimizedModel',
+        name: 'WD14 Tagger Cache Optimized Model',
+        defaultValue: true,
+        type: 'boolean',
+        tooltip: 'Save the optimized graph next to the model on first load so later loads skip graph optimization.',
+    },
+    {
+        id: 'sn0w.TaggerSettings.TagCacheSize',
+        name: 'Upscaler Tile Tag Cache Size',
+        defaultValue: 4096,
+        min: 0,
+        max: 65536,
+        step: 256,
+        type: 'slider',
+        tooltip: 'Number of tile tagging results remembered between upscaler runs. 0 disables the cache.',
+    },
+    {
+        id: 'sn0w.TaggerSettings.PersistTagCache',
+        name: 'Upscaler Persist Tile Tag Cache',
+        defaultValue: false,
+        type: 'boolean',
+        tooltip: 'Keep the tile tag cache on disk so it survives restarts.',
+    },
+]
+
+taggerSettingsDefinitions.forEach((setting) => {
+    SettingUtils.registerSetting(setting);
+});